@@ -35,19 +35,23 @@ logger = logging.getLogger(__name__)
 # ==========================================================
 from aiohttp import web
 from hydrogram import Client, types
+from hydrogram.errors import FloodWait
 from web import web_app
 from info import (
     API_ID, API_HASH, BOT_TOKEN, PORT, ADMINS, 
-    LOG_CHANNEL, DATABASE_URL, DATABASE_NAME
+    LOG_CHANNEL, DATABASE_URL, DATABASE_NAME, INDEX_PREFETCH
 )
 from utils import temp
 from database.users_chats_db import db
 
 # ⚡ IMPORTANT: Import Database Indexer
-from database.ia_filterdb import ensure_indexes
+from database.ia_filterdb import ensure_indexes, load_search_engines, backfill_tags
 
 # -------------------- IMPORT PREMIUM MODULE --------------------
 from plugins.premium import check_premium_expired
+from plugins.index import resume_index_jobs
+from plugins.channel import live_index_flusher
+from web.utils.workers import start_workers, stop_workers
 
 # ==========================================================
 # BOT CLASS
@@ -72,6 +76,12 @@ class Bot(Client):
         await ensure_indexes()
         logger.info("✅ Database Indexes Checked/Created")
 
+        # 2.0 Tag docs indexed before tagging existed (no-op when done)
+        asyncio.create_task(backfill_tags())
+
+        # 2.1 In-memory search engines (optional, Mongo serves until ready)
+        asyncio.create_task(load_search_engines())
+
         # 3. Load banned users & chats (Async)
         try:
             b_users, b_chats = await db.get_banned()
@@ -102,6 +112,9 @@ class Bot(Client):
         temp.U_NAME = me.username
         temp.B_NAME = me.first_name
 
+        # 5.1 Streaming worker bots (WORKER_TOKENS)
+        await start_workers(self)
+
         # 6. Start Web Server
         runner = web.AppRunner(web_app, access_log=None)
         await runner.setup()
@@ -111,6 +124,12 @@ class Bot(Client):
         # 7. Start Premium Checker Task
         asyncio.create_task(check_premium_expired(self))
 
+        # 7.1 Resume index jobs interrupted by a crash / restart
+        asyncio.create_task(resume_index_jobs(self))
+
+        # 7.2 Live auto-indexing of INDEX_CHANNELS (micro-batch flusher)
+        asyncio.create_task(live_index_flusher())
+
         # 8. Send Startup Logs
         ist = pytz.timezone("Asia/Kolkata")
         now = datetime.now(ist)
@@ -146,30 +165,70 @@ class Bot(Client):
         logger.info(f"@{me.username} is Online & Ready!")
 
     async def stop(self, *args):
+        await stop_workers()
         await super().stop()
         logger.info("Bot stopped. Bye 👋")
 
-    # Custom iterator (Keeping your logic)
+    # Custom iterator (Prefetching producer / consumer)
     async def iter_messages(
         self: Client,
         chat_id: Union[int, str],
         limit: int,
-        offset: int = 0
+        offset: int = 0,
+        prefetch: int = INDEX_PREFETCH,
+        budget=None
     ) -> Optional[AsyncGenerator["types.Message", None]]:
-        current = offset
-        while current < limit:
-            diff = min(200, limit - current)
+        """
+        Yields messages offset..limit while a background task keeps up to
+        `prefetch` batches of 200 ids fetched ahead, so Telegram fetches
+        overlap with the caller's parsing / DB writes.
+        FloodWait pauses the fetcher instead of aborting the run; with a
+        shared `budget` (utils.FloodBudget) it pauses every job using it.
+        """
+        queue = asyncio.Queue(maxsize=max(prefetch, 1))
+
+        async def fetcher():
+            current = offset
             try:
-                messages = await self.get_messages(
-                    chat_id,
-                    list(range(current, current + diff))
-                )
-                for message in messages:
-                    yield message
-                current += diff
+                while current < limit:
+                    diff = min(200, limit - current)
+                    if budget:
+                        await budget.acquire()
+                    try:
+                        messages = await self.get_messages(
+                            chat_id,
+                            list(range(current, current + diff))
+                        )
+                    except FloodWait as e:
+                        logger.warning(f"FloodWait {e.value}s while fetching messages")
+                        if budget:
+                            budget.flood(e.value)
+                        else:
+                            await asyncio.sleep(e.value)
+                        continue
+                    await queue.put(messages)
+                    current += diff
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"Error fetching messages: {e}")
+                # Hand the error to the consumer – a half-read channel is not "done"
+                await queue.put(e)
                 return
+            await queue.put(None)
+
+        task = asyncio.create_task(fetcher())
+        try:
+            while True:
+                messages = await queue.get()
+                if messages is None:
+                    return
+                if isinstance(messages, Exception):
+                    raise messages
+                for message in messages:
+                    yield message
+        finally:
+            task.cancel()
 
 # ==========================================================
 # MAIN EXECUTION
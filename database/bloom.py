@@ -0,0 +1,39 @@
+import math
+import hashlib
+
+# ─────────────────────────────────────────
+# 🌸 BLOOM FILTER (CROSS-TIER DEDUPE)
+# ─────────────────────────────────────────
+class BloomFilter:
+    """
+    Fixed-size bit array with `k` probes per key.
+
+    "not in" is exact, "in" may be a false positive (~error_rate at
+    `capacity` keys, rising past it) – callers confirm hits elsewhere.
+    ~1.2 MB per million keys at 1%.
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.01):
+        capacity = max(capacity, 1000)
+        self.size = int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.k = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _probes(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        # Kirsch–Mitzenmacher: k probes from two hashes
+        return ((h1 + i * h2) % self.size for i in range(self.k))
+
+    def add(self, key):
+        for bit in self._probes(key):
+            self.bits[bit >> 3] |= 1 << (bit & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[bit >> 3] & (1 << (bit & 7)) for bit in self._probes(key))
+
+    def stats(self):
+        return {"keys": self.count, "memory": len(self.bits), "hashes": self.k}
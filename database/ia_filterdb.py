@@ -1,11 +1,25 @@
 import logging
+import asyncio
+import time
 import re
 import base64
 from struct import pack
 import motor.motor_asyncio
 from hydrogram.file_id import FileId
 from pymongo.errors import DuplicateKeyError
-from info import DATABASE_URL, DATABASE_NAME, MAX_BTN
+from pymongo import UpdateOne, ReplaceOne
+from pymongo.errors import BulkWriteError
+from info import (
+    DATABASE_URL, DATABASE_NAME, MAX_BTN, CACHE_TIME, SEARCH_CACHE_SIZE,
+    LANGUAGES, QUALITY,
+    SEARCH_FANOUT, SEARCH_FACET, SEARCH_COUNT_CAP, MEMORY_INDEX,
+    SPELL_CHECK, SPELL_MAX_EDIT, SPELL_MIN_COUNT, SPELL_MAX_WORDS, SPELL_MAX_MB,
+    INDEX_BATCH_SIZE, INDEX_FLUSH_SECS
+)
+from database.search_cache import SearchCache
+from database.memory_index import MemoryIndex
+from database.spell import SpellChecker
+from database.bloom import BloomFilter
 
 logger = logging.getLogger(__name__)
 
@@ -30,11 +44,24 @@ COLLECTIONS = {
     "archive": archive
 }
 
+# Resumable indexing jobs (checkpoints)
+index_jobs = db["IndexJobs"]
+# Per (channel, tier) high-water mark for incremental re-index
+index_marks = db["IndexMarks"]
+# file_unique_id:size -> owning tier / _id (one copy across all tiers)
+file_keys = db["FileKeys"]
+
+# 🧊 Search result cache (TTL = CACHE_TIME)
+search_cache = SearchCache(max_size=SEARCH_CACHE_SIZE, ttl=CACHE_TIME)
+
+# 🔗 In-flight searches: cache key -> Future shared by concurrent callers
+_INFLIGHT = {}
+
 # ─────────────────────────────────────────
 # ⚡ INDEXES (BACKGROUND)
 # ─────────────────────────────────────────
 async def ensure_indexes():
-    """Create text indexes for fast search"""
+    """Create text indexes for fast search + tag indexes for DB-side filters"""
     for name, col in COLLECTIONS.items():
         try:
             await col.create_index(
@@ -42,8 +69,40 @@ async def ensure_indexes():
                 name=f"{name}_text",
                 background=True
             )
+            await col.create_index("language", name=f"{name}_language", background=True)
+            # Compound indexes for tag-only queries ("2018 720p", "s02e05 >1gb").
+            # A query with free text is planned on the text index; tags then
+            # only filter its match set.
+            await col.create_index(
+                [("year", 1), ("quality", 1), ("file_size", 1)],
+                name=f"{name}_year_quality_size",
+                background=True
+            )
+            await col.create_index(
+                [("season", 1), ("episode", 1), ("quality", 1)],
+                name=f"{name}_season_episode_quality",
+                background=True
+            )
+            await col.create_index(
+                [("quality", 1), ("file_size", 1)],
+                name=f"{name}_quality_size",
+                background=True
+            )
+            await col.create_index("file_size", name=f"{name}_size", background=True)
+            # Lets the startup backfill find untagged docs without a collection scan
+            await col.create_index("tags_v", name=f"{name}_tags_v", background=True)
+            await col.create_index(
+                [("chat_id", 1), ("msg_id", 1)],
+                name=f"{name}_source_msg",
+                sparse=True,
+                background=True
+            )
         except Exception as e:
             logger.error(f"Index creation failed for {name}: {e}")
+    try:
+        await file_keys.create_index([("tier", 1), ("file_id", 1)], name="tier_file", background=True)
+    except Exception as e:
+        logger.error(f"Index creation failed for FileKeys: {e}")
 
 # ─────────────────────────────────────────
 # 🧠 FAST NORMALIZER
@@ -63,6 +122,197 @@ def prefix_query(q: str) -> str:
     """Create prefix query for fallback"""
     return " ".join(w[:4] for w in q.split() if len(w) >= 3)
 
+# ─────────────────────────────────────────
+# 🏷️ INDEX-TIME TAGS (LANGUAGE / QUALITY / YEAR / SxxEyy)
+# ─────────────────────────────────────────
+TAGS_VERSION = 2
+
+YEAR_RE = re.compile(r"\b(19[2-9]\d|20\d{2})\b")
+SXE_RE = re.compile(r"\bs(\d{1,2}) ?e(?:p)?(\d{1,3})\b")
+SEASON_RE = re.compile(r"\b(?:s|season) ?(\d{1,2})\b")
+EPISODE_RE = re.compile(r"\b(?:e|ep|episode) ?(\d{1,3})\b")
+
+def extract_tags(text: str) -> dict:
+    """Structured tags from a file name/caption (only found keys are set)"""
+    # "Movie.[Hindi].(720p)" / "Film_2019_S01E02" -> plain alnum tokens
+    tokens = re.findall(r"[a-z0-9]+", text.lower())
+    words = set(tokens)
+    text = " ".join(tokens)
+    tags = {"tags_v": TAGS_VERSION}
+
+    langs = [l for l in LANGUAGES if l in words]
+    if langs:
+        tags["language"] = langs
+
+    quality = next((q for q in QUALITY if q in words), None)
+    if quality:
+        tags["quality"] = quality
+
+    m = YEAR_RE.search(text)
+    if m:
+        tags["year"] = int(m.group(1))
+
+    m = SXE_RE.search(text)
+    if m:
+        tags["season"], tags["episode"] = int(m.group(1)), int(m.group(2))
+    else:
+        m = SEASON_RE.search(text)
+        if m:
+            tags["season"] = int(m.group(1))
+        m = EPISODE_RE.search(text)
+        if m:
+            tags["episode"] = int(m.group(1))
+    return tags
+
+# ─────────────────────────────────────────
+# 🧩 STRUCTURED QUERY PARSER
+# ─────────────────────────────────────────
+SIZE_UNITS = {"kb": 1024, "mb": 1024 ** 2, "gb": 1024 ** 3}
+SIZE_CMP_RE = re.compile(r"^(?:size:)?(<=|>=|<|>)(\d+(?:\.\d+)?)(kb|mb|gb)$")
+SIZE_RANGE_RE = re.compile(r"^size:(\d+(?:\.\d+)?)-(\d+(?:\.\d+)?)(kb|mb|gb)$")
+SIZE_OPS = {"<": "$lt", "<=": "$lte", ">": "$gt", ">=": "$gte"}
+
+def parse_query(raw: str):
+    """
+    Split a raw user query into free text + structured filters.
+
+    Recognised tokens: year (2018 / year:2018), season/episode (s02, s02e05,
+    e05), a QUALITY value (720p), size bounds (>1gb, <=700mb, size:1-2gb).
+    Only values extract_tags can store become tag filters, anything else
+    stays free text. Brackets/commas around a token are ignored, the same
+    way extract_tags tokenizes names – "(720p)" matches a 720p tag.
+    Returns (free_text, filters) where filters is a Mongo predicate dict.
+    """
+    free, filters, size = [], {}, {}
+    for word in raw.lower().split():
+        word = word.strip("()[]{},;!?\"'")
+        if not word:
+            continue
+        m = YEAR_RE.fullmatch(word.removeprefix("year:"))
+        if m:
+            filters["year"] = int(m.group(1))
+            continue
+        m = SXE_RE.fullmatch(word)
+        if m:
+            filters["season"], filters["episode"] = int(m.group(1)), int(m.group(2))
+            continue
+        m = re.fullmatch(r"s(\d{1,2})", word)
+        if m:
+            filters["season"] = int(m.group(1))
+            continue
+        m = re.fullmatch(r"ep?(\d{1,3})", word)
+        if m:
+            filters["episode"] = int(m.group(1))
+            continue
+        if word in QUALITY:
+            filters["quality"] = word
+            continue
+        m = SIZE_CMP_RE.match(word)
+        if m:
+            size[SIZE_OPS[m.group(1)]] = int(float(m.group(2)) * SIZE_UNITS[m.group(3)])
+            continue
+        m = SIZE_RANGE_RE.match(word)
+        if m:
+            unit = SIZE_UNITS[m.group(3)]
+            size["$gte"] = int(float(m.group(1)) * unit)
+            size["$lte"] = int(float(m.group(2)) * unit)
+            continue
+        free.append(word)
+
+    if size:
+        filters["file_size"] = size
+    return " ".join(free), filters
+
+async def backfill_tags(batch_size=1000):
+    """
+    Tag documents indexed before tagging existed (safe to re-run).
+    Runs on every start – a no-op once everything carries TAGS_VERSION.
+    """
+    updated = 0
+    for name, col in COLLECTIONS.items():
+        ops = []
+        cursor = col.find({"tags_v": {"$ne": TAGS_VERSION}}, {"file_name": 1, "caption": 1})
+        async for doc in cursor.batch_size(batch_size):
+            tags = extract_tags(f"{doc.get('file_name', '')} {doc.get('caption', '')}")
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": tags}))
+            if len(ops) >= batch_size:
+                res = await col.bulk_write(ops, ordered=False)
+                updated += res.modified_count
+                ops = []
+        if ops:
+            res = await col.bulk_write(ops, ordered=False)
+            updated += res.modified_count
+        search_cache.invalidate(name)
+        logger.info(f"🏷️ Tag backfill done for {name}")
+    return updated
+
+# ─────────────────────────────────────────
+# 🧠 IN-MEMORY ENGINES (MEMORY_INDEX / SPELL_CHECK)
+# ─────────────────────────────────────────
+memory_index = MemoryIndex(normalize_query)
+spell_checker = SpellChecker(
+    max_edit=SPELL_MAX_EDIT, min_count=SPELL_MIN_COUNT, max_words=SPELL_MAX_WORDS,
+    max_bytes=SPELL_MAX_MB * 1024 * 1024
+)
+
+async def load_search_engines():
+    """
+    Single streaming pass over all tiers at startup that feeds the
+    in-process index and the spell dictionary. Mongo serves until ready.
+    """
+    if not (MEMORY_INDEX or SPELL_CHECK):
+        return
+    start = time.time()
+    try:
+        if MEMORY_INDEX:
+            memory_index.reset()
+        for name, col in COLLECTIONS.items():
+            cursor = col.find({}, {"file_name": 1, "caption": 1, "file_size": 1})
+            seen = 0
+            async for doc in cursor.batch_size(5000):
+                if MEMORY_INDEX:
+                    memory_index.add(name, doc)
+                if SPELL_CHECK:
+                    # Captions too – $text searches them, so their words are "known"
+                    spell_checker.add_text(normalize_query(f"{doc.get('file_name', '')} {doc.get('caption', '')}"))
+                seen += 1
+                if seen % 1000 == 0:
+                    await asyncio.sleep(0)  # CPU-bound build – let handlers run
+    except Exception as e:
+        logger.error(f"Search engine build failed: {e}")
+        return
+
+    took = time.time() - start
+    if MEMORY_INDEX:
+        memory_index.mark_ready(took)
+        st = memory_index.stats()
+        logger.info(
+            f"🧠 Memory index ready: {st['docs']} files, {st['tokens']} tokens, "
+            f"{st['memory'] / 1048576:.1f} MB in {took:.1f}s"
+        )
+    if SPELL_CHECK:
+        st = spell_checker.stats()
+        logger.info(
+            f"🔤 Spell dictionary ready: {st['words']} words, {st['deletes']} deletes, "
+            f"{st['memory'] / 1048576:.1f} MB"
+        )
+
+def correct_query(q: str) -> str:
+    """
+    Typo fix for a query that found nothing (one dict lookup per word).
+    Only unknown plain words are rewritten; numbers like 2018 / s01 / 720p
+    are left untouched.
+    """
+    out = []
+    for word in q.split():
+        norm = normalize_query(word)
+        if not norm or " " in norm or any(c.isdigit() for c in word):
+            out.append(word)
+            continue
+        fixed = spell_checker.correct(norm)
+        out.append(word if fixed == norm else fixed)
+    return " ".join(out)
+
 # ─────────────────────────────────────────
 # 📊 DB STATS (ASYNC)
 # ─────────────────────────────────────────
@@ -85,91 +335,525 @@ async def db_count_documents():
 # ─────────────────────────────────────────
 # 💾 SAVE FILE (CORRECT STATS FIX)
 # ─────────────────────────────────────────
+def _media_doc(media):
+    # ✅ Old Logic ID Generation (Reliable)
+    file_id = unpack_new_file_id(media.file_id)
+    
+    # क्लीन नाम और कैप्शन
+    f_name = re.sub(r"@\w+|(_|\-|\.|\+)", " ", media.file_name or "").strip()
+    caption = re.sub(r"@\w+|(_|\-|\.|\+)", " ", media.caption or "").strip()
+
+    doc = {
+        "_id": file_id,             # यह ID सर्च और भेजने दोनों के काम आएगा
+        "file_name": f_name,
+        "caption": caption,
+        "file_size": media.file_size
+    }
+    # Source post (set by the indexers) – lets channel deletions reach the index
+    if getattr(media, "chat_id", None):
+        doc["chat_id"] = media.chat_id
+        doc["msg_id"] = media.msg_id
+    doc.update(extract_tags(f"{f_name} {caption}"))
+    return doc
+
+def unique_key(media):
+    """Same content => same key, whatever chat / tier it was indexed from"""
+    if not getattr(media, "file_unique_id", None):
+        return None
+    return f"{media.file_unique_id}:{media.file_size}"
+
+# ─────────────────────────────────────────
+# 🌸 CROSS-TIER DEDUPE (BLOOM + FileKeys)
+# ─────────────────────────────────────────
+key_filter = None
+_key_filter_lock = asyncio.Lock()
+
+async def load_file_keys():
+    """Preload FileKeys into the Bloom filter once (index jobs call it at start)"""
+    global key_filter
+    async with _key_filter_lock:
+        if key_filter is not None:
+            return key_filter
+        start = time.time()
+        total = await file_keys.estimated_document_count()
+        bloom = BloomFilter(capacity=total * 2 + 100000)
+        async for doc in file_keys.find({}, {"_id": 1}).batch_size(5000):
+            bloom.add(doc["_id"])
+        key_filter = bloom
+        logger.info(f"🌸 Loaded {bloom.count} file keys in {time.time() - start:.1f}s")
+        return key_filter
+
+async def _claim_keys(collection_type, docs, keys):
+    """
+    Decide which docs may be written to `collection_type`.
+
+    Keys the Bloom filter has never seen are claimed straight away; only
+    possible hits cost a ($in-batched) FileKeys lookup. The FileKeys unique
+    _id is the backstop when two tiers claim the same file concurrently.
+    Returns (docs to write, cross-tier duplicates, newly claimed keys).
+    """
+    bloom = await load_file_keys()
+    maybe = [k for k in keys.values() if k in bloom]
+    owners = {}
+    if maybe:
+        async for d in file_keys.find({"_id": {"$in": maybe}}):
+            owners[d["_id"]] = (d["tier"], d["file_id"])
+
+    write, claims, dup = {}, {}, 0
+    for _id, doc in docs.items():
+        key = keys.get(_id)
+        if key is None:
+            write[_id] = doc        # No unique id (very old media) – _id dedupe only
+        elif key not in owners:
+            claims[_id] = key
+        elif owners[key] == (collection_type, _id):
+            write[_id] = doc        # Re-index of the same copy
+        else:
+            dup += 1
+
+    claimed = {}
+    if claims:
+        entries = [{"_id": key, "tier": collection_type, "file_id": _id} for _id, key in claims.items()]
+        lost = set()
+        try:
+            await file_keys.insert_many(entries, ordered=False)
+        except BulkWriteError as e:
+            lost = {entries[err["index"]]["file_id"] for err in e.details.get("writeErrors", [])}
+        for _id, key in claims.items():
+            if _id in lost:
+                dup += 1
+            else:
+                write[_id] = docs[_id]
+                claimed[_id] = key
+    return write, dup, claimed
+
+def _after_write(collection_type, docs):
+    """Keep cache / memory index / spell dictionary in sync with a tier write"""
+    search_cache.invalidate(collection_type)
+    for doc in docs:
+        if MEMORY_INDEX:
+            memory_index.add(collection_type, doc)
+        if SPELL_CHECK:
+            spell_checker.add_text(normalize_query(f"{doc['file_name']} {doc['caption']}"))
+
 async def save_file(media, collection_type="primary"):
-    try:
-        # ✅ Old Logic ID Generation (Reliable)
-        file_id = unpack_new_file_id(media.file_id)
-        
-        # क्लीन नाम और कैप्शन
-        f_name = re.sub(r"@\w+|(_|\-|\.|\+)", " ", media.file_name or "").strip()
-        caption = re.sub(r"@\w+|(_|\-|\.|\+)", " ", media.caption or "").strip()
-
-        doc = {
-            "_id": file_id,             # यह ID सर्च और भेजने दोनों के काम आएगा
-            "file_name": f_name,
-            "caption": caption,
-            "file_size": media.file_size
-        }
+    """Single-file save, same dedupe rules as the bulk path"""
+    counts = await save_files([media], collection_type)
+    # matched / cross-tier copy => "dup", new => "suc"
+    for status in ("suc", "dup"):
+        if counts[status]:
+            return status
+    return "err"
 
-        col = COLLECTIONS.get(collection_type, primary)
-        
-        # ✅ FIX: Update or Insert logic with correct return status
-        result = await col.replace_one({"_id": file_id}, doc, upsert=True)
+# ─────────────────────────────────────────
+# 📦 BULK SAVE (INDEXING PIPELINE)
+# ─────────────────────────────────────────
+async def save_files(medias, collection_type="primary"):
+    """
+    Upsert many files with ONE unordered bulk_write.
+    Returns per-document counts: {"suc": new, "dup": existing, "err": failed}
+    """
+    counts = {"suc": 0, "dup": 0, "err": 0}
+    if collection_type not in COLLECTIONS:
+        collection_type = "primary"
+    col = COLLECTIONS[collection_type]
 
-        # अगर matched_count > 0 है, इसका मतलब फाइल पहले से थी (Update हुई)
-        if result.matched_count > 0:
-            return "dup"
-        # अगर नई फाइल बनी है (Insert हुई)
+    docs, keys = {}, {}
+    for media in medias:
+        try:
+            doc = _media_doc(media)
+        except Exception as e:
+            logger.error(f"Error preparing file: {e}")
+            counts["err"] += 1
+            continue
+        key = unique_key(media)
+        if not doc["_id"]:
+            counts["err"] += 1
+        elif doc["_id"] in docs or (key and key in keys.values()):
+            counts["dup"] += 1   # Same file twice in one batch
         else:
-            return "suc"
+            docs[doc["_id"]] = doc
+            if key:
+                keys[doc["_id"]] = key
+    if not docs:
+        return counts
+
+    # 🌸 Drop copies already stored in any tier
+    try:
+        docs, dup, claimed = await _claim_keys(collection_type, docs, keys)
+    except Exception as e:
+        logger.error(f"File key check failed: {e}")
+        counts["err"] += len(docs)
+        return counts
+    counts["dup"] += dup
+    if not docs:
+        return counts
 
+    ops = [ReplaceOne({"_id": _id}, doc, upsert=True) for _id, doc in docs.items()]
+    try:
+        res = await col.bulk_write(ops, ordered=False)
+        counts["suc"] += res.upserted_count
+        counts["dup"] += res.matched_count
+        written = list(docs.values())
+    except BulkWriteError as e:
+        details = e.details
+        failed = {err["index"] for err in details.get("writeErrors", [])}
+        counts["suc"] += details.get("nUpserted", 0)
+        counts["dup"] += details.get("nMatched", 0)
+        counts["err"] += len(failed)
+        written = [doc for i, doc in enumerate(docs.values()) if i not in failed]
     except Exception as e:
-        logger.error(f"Error saving file: {e}")
-        return "err"
+        logger.error(f"Bulk save failed: {e}")
+        counts["err"] += len(docs)
+        written = []
+
+    # Release claims of docs that never made it, remember the rest
+    ok = {doc["_id"] for doc in written}
+    released = [key for _id, key in claimed.items() if _id not in ok]
+    if released:
+        try:
+            await file_keys.delete_many({"_id": {"$in": released}})
+        except Exception as e:
+            logger.error(f"Releasing file keys failed: {e}")
+    for _id, key in claimed.items():
+        if _id in ok:
+            key_filter.add(key)
+
+    if written:
+        _after_write(collection_type, written)
+    return counts
+
+
+class BulkSaver:
+    """
+    Accumulates files and flushes them with save_files() when the batch is
+    full or `flush_interval` seconds have passed since the last flush.
+    Running suc/dup/err totals are kept for progress messages.
+    """
+
+    def __init__(self, collection_type="primary", batch_size=INDEX_BATCH_SIZE, flush_interval=INDEX_FLUSH_SECS):
+        self.collection_type = collection_type
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.suc = self.dup = self.err = 0
+        self.writes = 0
+        self._last_flush = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def add(self, media):
+        self.pending.append(media)
+        if (len(self.pending) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            self._last_flush = time.monotonic()
+            if not self.pending:
+                return
+            batch, self.pending = self.pending, []
+            counts = await save_files(batch, self.collection_type)
+            self.suc += counts["suc"]
+            self.dup += counts["dup"]
+            self.err += counts["err"]
+            self.writes += 1
+
+# ─────────────────────────────────────────
+# 📌 INDEX JOBS (RESUMABLE CHECKPOINTS)
+# ─────────────────────────────────────────
+async def create_index_job(job_id, chat, lst_msg_id, skip, collection_type, status_chat):
+    await index_jobs.insert_one({
+        "_id": job_id,
+        "chat": chat,
+        "lst_msg_id": lst_msg_id,
+        "skip": skip,
+        "current": skip,
+        "collection": collection_type,
+        "status_chat": status_chat,
+        "status": "running",
+        "counters": {},
+        "created": time.time(),
+        "updated": time.time()
+    })
+
+async def checkpoint_index_job(job_id, current, counters):
+    """Persist progress – only call after the pending batch was flushed"""
+    await index_jobs.update_one(
+        {"_id": job_id},
+        {"$set": {"current": current, "counters": counters, "updated": time.time()}}
+    )
+
+async def set_index_job_status(job_id, status):
+    await index_jobs.update_one(
+        {"_id": job_id},
+        {"$set": {"status": status, "updated": time.time()}}
+    )
+
+async def get_index_job(job_id):
+    return await index_jobs.find_one({"_id": job_id})
+
+async def get_running_index_jobs():
+    return await index_jobs.find({"status": "running"}).to_list(length=None)
+
+async def get_index_mark(chat_id, collection_type):
+    """Last message id indexed from `chat_id` into `collection_type` (0 = never)"""
+    mark = await index_marks.find_one({"_id": f"{chat_id}:{collection_type}"})
+    return mark["last_msg_id"] if mark else 0
+
+async def set_index_mark(chat_id, collection_type, last_msg_id):
+    """Advance the high-water mark ($max – never moves backwards)"""
+    await index_marks.update_one(
+        {"_id": f"{chat_id}:{collection_type}"},
+        {
+            "$max": {"last_msg_id": last_msg_id},
+            "$set": {"chat": chat_id, "collection": collection_type, "updated": time.time()}
+        },
+        upsert=True
+    )
 
 # ─────────────────────────────────────────
 # 🔍 ULTRA FAST SEARCH CORE (ASYNC)
 # ─────────────────────────────────────────
-def _text_filter(q):
-    return {"$text": {"$search": q}}
+def _text_filter(q, filters=None):
+    # No free text (e.g. "2018 720p") -> pure structured query on tag indexes
+    flt = {"$text": {"$search": q}} if q else {}
+    if filters:
+        flt.update(filters)
+    return flt
 
-async def _search(col, q, offset, limit):
-    try:
-        cursor = col.find(
-            _text_filter(q),
-            {
-                "file_name": 1,
-                "file_size": 1,
-                "caption": 1,
-                "score": {"$meta": "textScore"}
-            }
-        )
+SEARCH_PROJECTION = {
+    "file_name": 1,
+    "file_size": 1,
+    "caption": 1,
+    "score": {"$meta": "textScore"}
+}
+
+async def _search_find(col, q, offset, limit, filters=None):
+    """Classic path: find().skip().limit() + count_documents (2 round trips)"""
+    if q:
+        cursor = col.find(_text_filter(q, filters), SEARCH_PROJECTION)
         cursor.sort([("score", {"$meta": "textScore"})])
-        cursor.skip(offset).limit(limit)
-        
-        docs = await cursor.to_list(length=limit)
-        
+    else:
+        cursor = col.find(_text_filter(q, filters), {"file_name": 1, "file_size": 1, "caption": 1})
+        cursor.sort("_id", 1)
+    cursor.skip(offset).limit(limit)
+
+    docs = await cursor.to_list(length=limit)
+    count = await col.count_documents(_text_filter(q, filters))
+    return docs, count, False
+
+def _count_limit(offset, limit):
+    """
+    Upper bound for the $facet count branch.
+    Always covers the next page so pagination keeps working past the cap.
+    """
+    if SEARCH_COUNT_CAP <= 0:
+        return None
+    return max(SEARCH_COUNT_CAP, offset + limit + 1)
+
+def _seek_filter(after):
+    """Range predicate that resumes right after the last (score, _id) seen"""
+    score, last_id = after
+    return {"$or": [
+        {"score": {"$lt": score}},
+        {"score": score, "_id": {"$gt": last_id}}
+    ]}
+
+async def _search_facet(col, q, offset, limit, after=None, filters=None):
+    """
+    Page + total in ONE aggregation round trip via $facet.
+    With `after` (keyset token) the page is fetched with a range predicate
+    instead of $skip, so deep pages cost the same as page 1.
+    """
+    count_stage = [{"$count": "n"}]
+    count_limit = _count_limit(offset, limit)
+    if count_limit:
+        # One extra doc tells "exactly N" apart from "more than N"
+        count_stage.insert(0, {"$limit": count_limit + 1})
+
+    docs_stage = [
+        {"$sort": {"score": -1, "_id": 1}},
+        {"$limit": limit},
+        {"$project": {"file_name": 1, "file_size": 1, "caption": 1, "score": 1}}
+    ]
+    if after:
+        docs_stage.insert(0, {"$match": _seek_filter(after)})
+    elif offset:
+        docs_stage.insert(1, {"$skip": offset})
+
+    pipeline = [
+        {"$match": _text_filter(q, filters)},
+        {"$addFields": {"score": {"$meta": "textScore"} if q else 0}},
+        {"$facet": {
+            "docs": docs_stage,
+            "total": count_stage
+        }}
+    ]
+    res = await col.aggregate(pipeline).to_list(length=1)
+    if not res:
+        return [], 0, False
+
+    docs = res[0]["docs"]
+    total = res[0]["total"][0]["n"] if res[0]["total"] else 0
+    if count_limit and total > count_limit:
+        return docs, count_limit, True
+    return docs, total, False
+
+_search_errors = 0
+
+async def _search(col, q, offset, limit, after=None, filters=None):
+    try:
+        # Tag filters stay DB-side (indexed fields); memory index serves plain text
+        if memory_index.ready and not filters:
+            docs, count = memory_index.search(col.name.lower(), q, offset, limit, after)
+            capped = False
+        elif SEARCH_FACET:
+            docs, count, capped = await _search_facet(col, q, offset, limit, after, filters)
+        else:
+            docs, count, capped = await _search_find(col, q, offset, limit, filters)
+
         # ✅ CRITICAL FIX:
         # बोट प्लगइन को 'file_id' चाहिए होता है, लेकिन मोंगो '_id' देता है।
+        tier = col.name.lower()
         for doc in docs:
             doc['file_id'] = doc['_id']
+            doc['tier'] = tier      # deep links carry it -> 1 lookup on /start
 
-        count = await col.count_documents(_text_filter(q))
-        return docs, count
+        # capped: count stopped at the cap, the real total is higher ('N+')
+        return docs, count, capped
     except Exception as e:
+        global _search_errors
+        _search_errors += 1
         logger.error(f"Search error: {e}")
-        return [], 0
+        return [], 0, False
+
+# ─────────────────────────────────────────
+# 🌐 PARALLEL FAN-OUT (ALL TIERS AT ONCE)
+# ─────────────────────────────────────────
+TIERS = [("primary", primary), ("cloud", cloud), ("archive", archive)]
+
+async def _first_hit(tasks):
+    """
+    Await tier tasks in priority order and return the first non-empty page.
+    Lower tiers are cancelled as soon as a higher tier fills the page.
+    """
+    try:
+        for name, task in tasks:
+            docs, cnt, capped = await task
+            if docs:
+                return docs, cnt, capped, name
+        return [], 0, False, None
+    finally:
+        for _, task in tasks:
+            if not task.done():
+                task.cancel()
+
+async def _fanout_search(query, prefix, offset, max_results, after=None, filters=None):
+    # 1. Exact query on every tier concurrently
+    tasks = [
+        (name, asyncio.create_task(_search(col, query, offset, max_results, after, filters)))
+        for name, col in TIERS
+    ]
+    docs, cnt, capped, source = await _first_hit(tasks)
+    if docs or not prefix:
+        return docs, cnt, capped, source
+
+    # 2. Fallback (Prefix Search) – again one concurrent round
+    tasks = [
+        (name, asyncio.create_task(_search(col, prefix, offset, max_results, after, filters)))
+        for name, col in TIERS
+    ]
+    return await _first_hit(tasks)
 
 # ─────────────────────────────────────────
 # 🚀 PUBLIC SEARCH API (ASYNC CASCADE)
 # ─────────────────────────────────────────
-async def get_search_results(query, max_results=MAX_BTN, offset=0, lang=None, collection_type="primary"):
+async def get_search_results(query, max_results=MAX_BTN, offset=0, lang=None, collection_type="primary", after=None):
+    """
+    `after` is an optional keyset token (score, _id) of the last file on the
+    previous page. When given it replaces skip(offset) for the page fetch;
+    `offset` is still used for page numbering and next_offset.
+    Returns (files, next_offset, total, source, capped) – capped means the
+    count stopped at SEARCH_COUNT_CAP and total is a lower bound.
+    """
     if not query or not query.strip():
-        return [], "", 0, collection_type
-    
-    query = normalize_query(query)
-    if not query:
-        return [], "", 0, collection_type
+        return [], "", 0, collection_type, False
     
+    # 🧩 year / SxxEyy / 720p / size tokens become indexed predicates
+    text, filters = parse_query(query)
+    plain = normalize_query(query) if filters else None
+    if lang:
+        filters["language"] = lang.lower()
+
+    query = normalize_query(text)
+    if not query and not filters:
+        return [], "", 0, collection_type, False
+
+    result = await _cached_search(query, filters, max_results, offset, collection_type, after)
+    # Nothing carries those tags (untagged / untaggable name) -> search the
+    # words as plain text like before. Later pages take the same path since
+    # the tagged search stays empty for them too.
+    if not result[0] and plain:
+        plain_filters = {"language": filters["language"]} if lang else {}
+        result = await _cached_search(plain, plain_filters, max_results, offset, collection_type, after)
+    return result
+
+async def _cached_search(query, filters, max_results, offset, collection_type, after):
+    """Cache + single-flight wrapper around _get_search_results"""
+    # 🧊 Cache lookup (same normalized query from any group)
+    key = (query, repr(sorted(filters.items())), collection_type, offset, after, max_results)
+    cached = search_cache.get(key, collection_type)
+    if cached is not None:
+        return cached
+
+    # 🔗 Single-flight: identical concurrent searches share one DB query
+    inflight = _INFLIGHT.get(key)
+    if inflight:
+        return await asyncio.shield(inflight)
+
+    inflight = asyncio.get_running_loop().create_future()
+    _INFLIGHT[key] = inflight
+    try:
+        versions = search_cache.snapshot(collection_type)
+        errors = _search_errors
+        result = await _get_search_results(query, max_results, offset, filters, collection_type, after)
+        # Never cache a page that is empty only because Mongo failed
+        if _search_errors == errors:
+            search_cache.set(key, versions, result)
+        inflight.set_result(result)
+        return result
+    except Exception as e:
+        inflight.set_exception(e)
+        # Mark retrieved so a leader-only failure doesn't log "never retrieved"
+        inflight.exception()
+        raise
+    finally:
+        if not inflight.done():
+            inflight.cancel()
+        _INFLIGHT.pop(key, None)
+
+async def _get_search_results(query, max_results, offset, filters, collection_type, after):
+    # 🏷️ Tag filters are pushed into the Mongo query (correct totals & pages)
+    filters = filters or None
     prefix = prefix_query(query)
     results = []
     total = 0
+    capped = False
     actual_source = collection_type
 
+    # ⚡ PARALLEL FAN-OUT: Primary + Cloud + Archive together
+    if collection_type == "all" and SEARCH_FANOUT:
+        docs, cnt, capped, source = await _fanout_search(query, prefix, offset, max_results, after, filters)
+        if docs:
+            results.extend(docs)
+            total += cnt
+            actual_source = source
+
     # ⚡ ASYNC CASCADE SEARCH: Primary → Cloud → Archive
-    if collection_type == "all":
+    elif collection_type == "all":
         # 1. Primary
-        docs, cnt = await _search(primary, query, offset, max_results)
+        docs, cnt, capped = await _search(primary, query, offset, max_results, after, filters)
         if docs:
             results.extend(docs)
             total += cnt
@@ -177,7 +861,7 @@ async def get_search_results(query, max_results=MAX_BTN, offset=0, lang=None, co
         
         # 2. Cloud (If primary failed)
         if not results:
-            docs, cnt = await _search(cloud, query, offset, max_results)
+            docs, cnt, capped = await _search(cloud, query, offset, max_results, after, filters)
             if docs:
                 results.extend(docs)
                 total += cnt
@@ -185,7 +869,7 @@ async def get_search_results(query, max_results=MAX_BTN, offset=0, lang=None, co
             
             # 3. Archive (If cloud failed)
             if not results:
-                docs, cnt = await _search(archive, query, offset, max_results)
+                docs, cnt, capped = await _search(archive, query, offset, max_results, after, filters)
                 if docs:
                     results.extend(docs)
                     total += cnt
@@ -194,7 +878,7 @@ async def get_search_results(query, max_results=MAX_BTN, offset=0, lang=None, co
                 # 4. Fallback (Prefix Search)
                 if not results and prefix:
                     for col_name, col in [("primary", primary), ("cloud", cloud), ("archive", archive)]:
-                        docs, cnt = await _search(col, prefix, 0, max_results)
+                        docs, cnt, capped = await _search(col, prefix, offset, max_results, after, filters)
                         if docs:
                             results.extend(docs)
                             total += cnt
@@ -204,32 +888,27 @@ async def get_search_results(query, max_results=MAX_BTN, offset=0, lang=None, co
     # Single Collection Search
     elif collection_type in COLLECTIONS:
         col = COLLECTIONS[collection_type]
-        docs, cnt = await _search(col, query, offset, max_results)
+        docs, cnt, capped = await _search(col, query, offset, max_results, after, filters)
         results.extend(docs)
         total += cnt
         
+        # Prefix pages follow the same offset / token as the first page did
         if not results and prefix:
-            docs, cnt = await _search(col, prefix, 0, max_results)
+            docs, cnt, capped = await _search(col, prefix, offset, max_results, after, filters)
             results.extend(docs)
             total += cnt
             
     else:
         # Default fallback
-        docs, cnt = await _search(primary, query, offset, max_results)
+        docs, cnt, capped = await _search(primary, query, offset, max_results, after, filters)
         results.extend(docs)
         total += cnt
 
-    # 5. Language Filter
-    if lang and results:
-        lang = lang.lower()
-        results = [f for f in results if lang in f["file_name"].lower()]
-        total = len(results)
-
     next_offset = offset + max_results
     if next_offset >= total:
         next_offset = ""
 
-    return results, next_offset, total, actual_source
+    return results, next_offset, total, actual_source, capped
 
 # ─────────────────────────────────────────
 # 🗑 DELETE FILES (ASYNC)
@@ -241,7 +920,11 @@ async def delete_files(query, collection_type="all"):
             for name, col in COLLECTIONS.items():
                 if collection_type != "all" and name != collection_type: continue
                 res = await col.delete_many({})
+                await file_keys.delete_many({"tier": name})
                 deleted += res.deleted_count
+                search_cache.invalidate(name)
+                if MEMORY_INDEX:
+                    memory_index.clear_tier(name)
             return deleted
         
         query = normalize_query(query)
@@ -250,27 +933,72 @@ async def delete_files(query, collection_type="all"):
         flt = _text_filter(query)
         for name, col in COLLECTIONS.items():
             if collection_type != "all" and name != collection_type: continue
-            res = await col.delete_many(flt)
-            deleted += res.deleted_count
-            if res.deleted_count > 0:
-                logger.info(f"🗑️ Deleted {res.deleted_count} from {name}")
+            deleted += await _delete_where(name, col, flt)
 
         return deleted
     except Exception as e:
         logger.error(f"Error deleting: {e}")
         return deleted
 
+async def _delete_where(name, col, flt):
+    """delete_many + keep cache / memory index / FileKeys in sync"""
+    # Resolve ids first so every side index drops exactly what Mongo drops
+    ids = [d["_id"] async for d in col.find(flt, {"_id": 1})]
+    if not ids:
+        return 0
+    res = await col.delete_many({"_id": {"$in": ids}})
+    # Freed keys may be indexed again (Bloom keeps them -> one lookup, then claim)
+    await file_keys.delete_many({"tier": name, "file_id": {"$in": ids}})
+    if MEMORY_INDEX:
+        memory_index.remove(name, ids)
+    if res.deleted_count > 0:
+        search_cache.invalidate(name)
+        logger.info(f"🗑️ Deleted {res.deleted_count} from {name}")
+    return res.deleted_count
+
+async def delete_channel_messages(chat_id, msg_ids):
+    """
+    Drop index entries whose source post was deleted from a channel.
+    Uses the (chat_id, msg_id) captured at index time – one delete_many
+    per tier for the whole batch.
+    """
+    flt = {"chat_id": chat_id, "msg_id": {"$in": list(msg_ids)}}
+    deleted = 0
+    for name, col in COLLECTIONS.items():
+        try:
+            deleted += await _delete_where(name, col, flt)
+        except Exception as e:
+            logger.error(f"Error deleting channel posts from {name}: {e}")
+    return deleted
+
 # ─────────────────────────────────────────
 # 📂 FILE DETAILS & UTILS (ASYNC)
 # ─────────────────────────────────────────
-async def get_file_details(file_id):
+# One-letter tier hint for /start payloads: file<p|c|a>_<grp>_<id>
+TIER_CODES = {"primary": "p", "cloud": "c", "archive": "a"}
+CODE_TIERS = {v: k for k, v in TIER_CODES.items()}
+
+def file_start_payload(grp_id, file):
+    """Deep-link payload; old `file_<grp>_<id>` links (no hint) keep working"""
+    return f"file{TIER_CODES.get(file.get('tier'), '')}_{grp_id}_{file['_id']}"
+
+async def get_file_details(file_id, tier=None):
+    """
+    With a tier hint: one find_one on that tier.
+    Without (or if the file moved): all tiers at once, first tier wins.
+    """
     try:
-        for col in COLLECTIONS.values():
-            doc = await col.find_one({"_id": file_id})
-            if doc:
-                doc['file_id'] = doc['_id'] # Compatibility fix
-                return doc
-        return None
+        doc = None
+        if tier in COLLECTIONS:
+            doc = await COLLECTIONS[tier].find_one({"_id": file_id})
+        if not doc:
+            docs = await asyncio.gather(
+                *(col.find_one({"_id": file_id}) for name, col in COLLECTIONS.items() if name != tier)
+            )
+            doc = next((d for d in docs if d), None)
+        if doc:
+            doc['file_id'] = doc['_id'] # Compatibility fix
+        return doc
     except Exception:
         return None
 
@@ -0,0 +1,156 @@
+import sys
+import math
+import heapq
+import logging
+from array import array
+
+logger = logging.getLogger(__name__)
+
+# ─────────────────────────────────────────
+# 🧠 IN-MEMORY INVERTED INDEX (OPTIONAL)
+# ─────────────────────────────────────────
+TIERS = ("primary", "cloud", "archive")
+
+
+class MemoryIndex:
+    """
+    Token -> posting list mirror of file names/captions.
+
+    Documents get compact int ids; every per-document field lives in
+    parallel arrays/lists indexed by that id, and posting lists are
+    array('I') per tier. Deletes are tombstones (alive[i] = 0) so
+    posting lists are append-only.
+    """
+
+    def __init__(self, normalize):
+        self.normalize = normalize
+        self.ready = False
+        self.build_time = 0.0
+        self._reset()
+
+    def _reset(self):
+        self.ids = []                   # int -> Mongo _id
+        self.names = []                 # int -> file_name
+        self.sizes = array("q")         # int -> file_size
+        self.tiers = bytearray()        # int -> tier index
+        self.alive = bytearray()        # int -> 1 / 0 (tombstone)
+        self.lookup = {}                # (tier index, _id) -> int
+        self.postings = [{} for _ in TIERS]
+        self.live = [0] * len(TIERS)
+
+    # ───────────── WRITE ─────────────
+
+    def add(self, tier, doc):
+        t = TIERS.index(tier)
+        key = (t, doc["_id"])
+        old = self.lookup.get(key)
+        if old is not None and self.alive[old]:
+            if self.names[old] == doc.get("file_name", ""):
+                self.sizes[old] = doc.get("file_size") or 0
+                return
+            self.alive[old] = 0
+            self.live[t] -= 1
+
+        i = len(self.ids)
+        self.ids.append(doc["_id"])
+        self.names.append(doc.get("file_name", ""))
+        self.sizes.append(doc.get("file_size") or 0)
+        self.tiers.append(t)
+        self.alive.append(1)
+        self.lookup[key] = i
+        self.live[t] += 1
+
+        text = f"{doc.get('file_name', '')} {doc.get('caption', '')}"
+        postings = self.postings[t]
+        for token in set(self.normalize(text).split()):
+            plist = postings.get(token)
+            if plist is None:
+                plist = postings[token] = array("I")
+            plist.append(i)
+
+    def remove(self, tier, ids):
+        t = TIERS.index(tier)
+        for _id in ids:
+            i = self.lookup.pop((t, _id), None)
+            if i is not None and self.alive[i]:
+                self.alive[i] = 0
+                self.live[t] -= 1
+
+    def clear_tier(self, tier):
+        t = TIERS.index(tier)
+        for key in [k for k in self.lookup if k[0] == t]:
+            self.alive[self.lookup.pop(key)] = 0
+        self.postings[t] = {}
+        self.live[t] = 0
+
+    # ───────────── READ ─────────────
+
+    def search(self, tier, q, offset, limit, after=None):
+        """
+        OR-match like $text, ranked by summed idf of matched tokens.
+        Order is (score desc, _id asc) so keyset tokens work the same way.
+        """
+        t = TIERS.index(tier)
+        postings = self.postings[t]
+        n = max(self.live[t], 1)
+        alive = self.alive
+
+        scores = {}
+        for token in set(q.split()):
+            plist = postings.get(token)
+            if not plist:
+                continue
+            weight = 1.0 + math.log(n / len(plist)) if len(plist) < n else 1.0
+            for i in plist:
+                if alive[i]:
+                    scores[i] = scores.get(i, 0.0) + weight
+
+        total = len(scores)
+        ids = self.ids
+        if after:
+            a_score, a_id = after
+            items = (
+                (s, i) for i, s in scores.items()
+                if s < a_score or (s == a_score and ids[i] > a_id)
+            )
+            top = heapq.nsmallest(limit, items, key=lambda x: (-x[0], ids[x[1]]))
+        else:
+            top = heapq.nsmallest(offset + limit, scores.items(), key=lambda x: (-x[1], ids[x[0]]))
+            top = [(s, i) for i, s in top[offset:]]
+
+        docs = [
+            {"_id": ids[i], "file_name": self.names[i], "file_size": self.sizes[i], "score": s}
+            for s, i in top
+        ]
+        return docs, total
+
+    # ───────────── BUILD / STATS ─────────────
+
+    def reset(self):
+        """Start a fresh build (called by the shared startup loader)"""
+        self.ready = False
+        self._reset()
+
+    def mark_ready(self, build_time):
+        self.build_time = build_time
+        self.ready = True
+
+    def memory_bytes(self):
+        size = sys.getsizeof(self.ids) + sum(map(sys.getsizeof, self.ids))
+        size += sys.getsizeof(self.names) + sum(map(sys.getsizeof, self.names))
+        size += sys.getsizeof(self.sizes) + sys.getsizeof(self.tiers) + sys.getsizeof(self.alive)
+        size += sys.getsizeof(self.lookup)
+        for postings in self.postings:
+            size += sys.getsizeof(postings)
+            for token, plist in postings.items():
+                size += sys.getsizeof(token) + sys.getsizeof(plist)
+        return size
+
+    def stats(self):
+        return {
+            "ready": self.ready,
+            "docs": sum(self.live),
+            "tokens": sum(len(p) for p in self.postings),
+            "memory": self.memory_bytes(),
+            "build_time": self.build_time
+        }
@@ -0,0 +1,75 @@
+import time
+from collections import OrderedDict
+
+# ─────────────────────────────────────────
+# 🧊 SEARCH RESULT CACHE (LRU + TTL)
+# ─────────────────────────────────────────
+TIERS = ("primary", "cloud", "archive")
+
+
+class SearchCache:
+    """
+    Bounded LRU cache for get_search_results.
+
+    Invalidation is O(1): every tier has a version counter that save/delete
+    bump, and each entry remembers the versions it was built from. Stale
+    entries are dropped on the next lookup (or evicted by LRU).
+    """
+
+    def __init__(self, max_size=1000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._versions = dict.fromkeys(TIERS, 0)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.max_size > 0 and self.ttl > 0
+
+    def snapshot(self, collection_type):
+        """Tier versions a result depends on – take it BEFORE querying"""
+        tiers = (collection_type,) if collection_type in self._versions else TIERS
+        return tuple(self._versions[t] for t in tiers)
+
+    def get(self, key, collection_type):
+        if not self.enabled:
+            return None
+        entry = self._data.get(key)
+        if entry:
+            expires, versions, value = entry
+            if expires > time.monotonic() and versions == self.snapshot(collection_type):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return None
+
+    def set(self, key, versions, value):
+        if not self.enabled:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, versions, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def invalidate(self, collection_type="all"):
+        """Bump tier version(s) – every entry touching them becomes stale"""
+        for tier in self._versions:
+            if collection_type in ("all", tier):
+                self._versions[tier] += 1
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups * 100) if lookups else 0.0
+        }
@@ -0,0 +1,156 @@
+import sys
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ─────────────────────────────────────────
+# 🔤 SYMSPELL-STYLE SPELL CORRECTION
+# ─────────────────────────────────────────
+def edit_distance(a, b, max_dist):
+    """Optimal string alignment distance, gives up (max_dist + 1) early"""
+    if abs(len(a) - len(b)) > max_dist:
+        return max_dist + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+            row_min = min(row_min, cur[j])
+        if row_min > max_dist:
+            return max_dist + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class SpellChecker:
+    """
+    Delete-neighbourhood dictionary (SymSpell).
+
+    Every word is stored under all strings reachable by deleting up to
+    `max_edit` characters from its first `prefix_len` characters. A lookup
+    generates the same deletes for the query word, so candidates come
+    from dict hits instead of scanning the vocabulary.
+
+    Only letters-only words of min_len..max_len are kept, and a word only
+    gets delete entries (becomes a correction target) once seen
+    `min_count` times – release-group tags, hashes and one-off typos stay
+    out of the delete dict. Growth stops at `max_words` words or an
+    estimated `max_bytes`, whichever comes first.
+    """
+
+    # Rough per-entry overhead of a dict slot + int/str headers (CPython, 64-bit)
+    SLOT_BYTES = 40
+
+    def __init__(self, max_edit=1, prefix_len=7, min_len=3, max_len=20, min_count=2,
+                 max_words=50000, max_bytes=32 * 1024 * 1024):
+        self.max_edit = max_edit
+        self.prefix_len = prefix_len
+        self.min_len = min_len
+        self.max_len = max_len
+        self.min_count = max(min_count, 1)
+        self.max_words = max_words
+        self.max_bytes = max_bytes
+        self.words = {}     # word -> frequency
+        self.deletes = {}   # delete -> word, or list of words if several share it
+        self.bytes = 0      # running estimate, checked against max_bytes
+
+    @property
+    def full(self):
+        return len(self.words) >= self.max_words or self.bytes >= self.max_bytes
+
+    def _edits(self, word):
+        word = word[:self.prefix_len]
+        out = {word}
+        frontier = {word}
+        for _ in range(self.max_edit):
+            nxt = set()
+            for w in frontier:
+                if len(w) <= 1:
+                    continue
+                for i in range(len(w)):
+                    nxt.add(w[:i] + w[i + 1:])
+            nxt -= out
+            out |= nxt
+            frontier = nxt
+        return out
+
+    def add_word(self, word):
+        if not self.min_len <= len(word) <= self.max_len or not word.isalpha():
+            return
+        count = self.words.get(word)
+        if count is None:
+            if self.full:
+                return
+            count = 0
+            self.bytes += sys.getsizeof(word) + self.SLOT_BYTES
+        self.words[word] = count + 1
+        if count + 1 == self.min_count and not self.full:
+            self._add_deletes(word)
+
+    def _add_deletes(self, word):
+        deletes = self.deletes
+        for d in self._edits(word):
+            cur = deletes.get(d)
+            if cur is None:
+                # Most deletes belong to one word – store the str, not a list
+                deletes[d] = word
+                self.bytes += sys.getsizeof(d) + self.SLOT_BYTES
+            elif isinstance(cur, str):
+                deletes[d] = [cur, word]
+                self.bytes += sys.getsizeof(deletes[d])
+            else:
+                cur.append(word)
+                self.bytes += 8
+
+    def add_text(self, text):
+        for word in text.split():
+            self.add_word(word)
+
+    def lookup(self, word):
+        """Best known word within max_edit (closest, then most frequent)"""
+        if word in self.words or len(word) < self.min_len or not word.isalpha():
+            return word
+        best, best_key = word, None
+        seen = set()
+        for d in self._edits(word):
+            cands = self.deletes.get(d, ())
+            if isinstance(cands, str):
+                cands = (cands,)
+            for cand in cands:
+                if cand in seen:
+                    continue
+                seen.add(cand)
+                dist = edit_distance(word, cand, self.max_edit)
+                if dist > self.max_edit:
+                    continue
+                key = (dist, -self.words[cand])
+                if best_key is None or key < best_key:
+                    best, best_key = cand, key
+        return best
+
+    def correct(self, query):
+        """Rewrite each unknown word of a normalized query"""
+        if not self.words:
+            return query
+        return " ".join(self.lookup(w) for w in query.split())
+
+    def memory_bytes(self):
+        size = sys.getsizeof(self.words) + sum(map(sys.getsizeof, self.words))
+        size += sys.getsizeof(self.deletes)
+        for d, cands in self.deletes.items():
+            size += sys.getsizeof(d)
+            if not isinstance(cands, str):
+                size += sys.getsizeof(cands)
+        return size
+
+    def stats(self):
+        return {
+            "words": len(self.words),
+            "deletes": len(self.deletes),
+            "memory": self.memory_bytes()
+        }
@@ -69,6 +69,8 @@ INDEX_CHANNELS = [
     int(x) if x.startswith("-") else x
     for x in environ.get("INDEX_CHANNELS", "").split()
 ]
+# Tier that new INDEX_CHANNELS posts are auto-indexed into
+INDEX_CHANNELS_COLLECTION = environ.get("INDEX_CHANNELS_COLLECTION", "primary").lower()
 
 LOG_CHANNEL = int(environ.get("LOG_CHANNEL", "0"))
 if not LOG_CHANNEL:
@@ -98,7 +100,20 @@ if not DATABASE_URL:
 TIME_ZONE = environ.get("TIME_ZONE", "Asia/Kolkata")
 DELETE_TIME = int(environ.get("DELETE_TIME", 3600))
 CACHE_TIME = int(environ.get("CACHE_TIME", 300))
+SEARCH_CACHE_SIZE = int(environ.get("SEARCH_CACHE_SIZE", 1000))
 MAX_BTN = int(environ.get("MAX_BTN", 12))
+INDEX_BATCH_SIZE = int(environ.get("INDEX_BATCH_SIZE", 500))
+INDEX_FLUSH_SECS = float(environ.get("INDEX_FLUSH_SECS", 2))
+INDEX_PREFETCH = int(environ.get("INDEX_PREFETCH", 3))
+INDEX_CHECKPOINT_SECS = int(environ.get("INDEX_CHECKPOINT_SECS", 30))
+INDEX_CONCURRENCY = int(environ.get("INDEX_CONCURRENCY", 2))
+INDEX_RPS = float(environ.get("INDEX_RPS", 5))
+INDEX_PROGRESS_SECS = int(environ.get("INDEX_PROGRESS_SECS", 10))
+LIVE_INDEX_BATCH = int(environ.get("LIVE_INDEX_BATCH", 50))
+LIVE_INDEX_FLUSH_SECS = float(environ.get("LIVE_INDEX_FLUSH_SECS", 3))
+DELETE_FLUSH_SECS = float(environ.get("DELETE_FLUSH_SECS", 5))
+# 0 = exact totals, otherwise totals above this are shown as "N+"
+SEARCH_COUNT_CAP = int(environ.get("SEARCH_COUNT_CAP", 1000))
 
 LANGUAGES = environ.get(
     "LANGUAGES", "hindi english"
@@ -125,6 +140,15 @@ PROTECT_CONTENT = is_enabled("PROTECT_CONTENT", False)
 SPELL_CHECK = is_enabled("SPELL_CHECK", True)
 IS_STREAM = is_enabled("IS_STREAM", True)
 IS_PREMIUM = is_enabled("IS_PREMIUM", True)
+SEARCH_FANOUT = is_enabled("SEARCH_FANOUT", True)
+SEARCH_FACET = is_enabled("SEARCH_FACET", True)
+MEMORY_INDEX = is_enabled("MEMORY_INDEX", False)
+# Each extra edit multiplies the delete dict (~10x RAM per step)
+SPELL_MAX_EDIT = int(environ.get("SPELL_MAX_EDIT", 1))
+# Dictionary caps: a word must appear this often to become a correction
+SPELL_MIN_COUNT = int(environ.get("SPELL_MIN_COUNT", 2))
+SPELL_MAX_WORDS = int(environ.get("SPELL_MAX_WORDS", 50000))
+SPELL_MAX_MB = int(environ.get("SPELL_MAX_MB", 32))
 
 
 # ─────────────────────────────────────────────
@@ -156,6 +180,18 @@ else:
     logger.error("Invalid URL")
     exit(1)
 
+# GetFile requests kept in flight per stream (read-ahead window)
+STREAM_PREFETCH = int(environ.get("STREAM_PREFETCH", 4))
+# Media sessions per DC – parts of one range are spread across them
+STREAM_SESSIONS = int(environ.get("STREAM_SESSIONS", 2))
+# Disk cache for hot chunks (MB, 0 = off)
+STREAM_CACHE_SIZE = int(environ.get("STREAM_CACHE_SIZE", 0))
+STREAM_CACHE_DIR = environ.get("STREAM_CACHE_DIR", "cache/chunks")
+# Shared RAM buffer for chunks being streamed right now (MB)
+STREAM_BUFFER_SIZE = int(environ.get("STREAM_BUFFER_SIZE", 64))
+# Extra bot tokens that share the streaming load (space separated)
+WORKER_TOKENS = environ.get("WORKER_TOKENS", "").split()
+
 
 # ─────────────────────────────────────────────
 # 🎭 REACTIONS / STICKERS
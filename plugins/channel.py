@@ -0,0 +1,89 @@
+import re
+import asyncio
+import logging
+from hydrogram import Client, filters
+from info import (
+    INDEX_CHANNELS, INDEX_CHANNELS_COLLECTION,
+    LIVE_INDEX_BATCH, LIVE_INDEX_FLUSH_SECS, DELETE_FLUSH_SECS
+)
+from database.ia_filterdb import BulkSaver, delete_channel_messages
+
+logger = logging.getLogger(__name__)
+
+# ─────────────────────────────────────────────
+# 📡 LIVE AUTO-INDEX (INDEX_CHANNELS)
+# ─────────────────────────────────────────────
+# New posts are micro-batched: one bulk_write per LIVE_INDEX_BATCH files
+# or every LIVE_INDEX_FLUSH_SECS, whichever comes first.
+live_saver = BulkSaver(
+    INDEX_CHANNELS_COLLECTION,
+    batch_size=LIVE_INDEX_BATCH,
+    flush_interval=LIVE_INDEX_FLUSH_SECS
+)
+
+@Client.on_message(filters.channel & filters.chat(INDEX_CHANNELS) & (filters.video | filters.document))
+async def live_index(bot, message):
+    media = getattr(message, message.media.value, None)
+    if not media:
+        return
+
+    # Same rule as manual indexing - skip files under 2 MB
+    if (getattr(media, 'file_size', 0) or 0) < 2097152:
+        return
+
+    media.caption = message.caption
+    media.chat_id = message.chat.id
+    media.msg_id = message.id
+    try:
+        media.file_name = re.sub(r"@\w+|(_|\-|\.|\+)", " ", str(media.file_name))
+    except:
+        pass
+
+    await live_saver.add(media)
+
+
+# ─────────────────────────────────────────────
+# 🗑️ DELETION PROPAGATION
+# ─────────────────────────────────────────────
+# chat_id -> {msg_id}; applied as one delete_many per chat per tier.
+# Telegram sends deletes for every channel the bot admins, so this is not
+# limited to INDEX_CHANNELS (manually indexed channels count too).
+PENDING_DELETES = {}
+
+@Client.on_deleted_messages(filters.channel)
+async def live_delete(bot, messages):
+    for message in messages:
+        if not message.chat:
+            continue
+        PENDING_DELETES.setdefault(message.chat.id, set()).add(message.id)
+
+
+async def flush_deletes():
+    while PENDING_DELETES:
+        chat_id, msg_ids = PENDING_DELETES.popitem()
+        deleted = await delete_channel_messages(chat_id, msg_ids)
+        if deleted:
+            logger.info(f"🗑️ {deleted} file(s) removed - {len(msg_ids)} post(s) deleted in {chat_id}")
+
+
+async def delete_flusher():
+    while True:
+        await asyncio.sleep(DELETE_FLUSH_SECS)
+        try:
+            await flush_deletes()
+        except Exception as e:
+            logger.error(f"Delete flush failed: {e}")
+
+
+async def live_index_flusher():
+    """Time-based flush so the last posts of a burst don't wait for the next one"""
+    asyncio.create_task(delete_flusher())
+    if not INDEX_CHANNELS:
+        return
+    logger.info(f"📡 Live indexing {len(INDEX_CHANNELS)} channel(s) into {INDEX_CHANNELS_COLLECTION.upper()}")
+    while True:
+        await asyncio.sleep(LIVE_INDEX_FLUSH_SECS)
+        try:
+            await live_saver.flush()
+        except Exception as e:
+            logger.error(f"Live index flush failed: {e}")
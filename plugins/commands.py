@@ -8,12 +8,15 @@ from hydrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
 from Script import script
 # ✅ Updated Import
-from database.ia_filterdb import db_count_documents, get_file_details, delete_files
+from database.ia_filterdb import (
+    db_count_documents, get_file_details, delete_files, search_cache, memory_index, backfill_tags,
+    spell_checker, CODE_TIERS
+)
 from database.users_chats_db import db
 
 from info import (
     IS_PREMIUM, URL, BIN_CHANNEL, STICKERS, ADMINS, 
-    LOG_CHANNEL, PICS, IS_STREAM, REACTIONS, PM_FILE_DELETE_TIME
+    LOG_CHANNEL, PICS, IS_STREAM, REACTIONS, PM_FILE_DELETE_TIME, MEMORY_INDEX, SPELL_CHECK
 )
 from utils import (
     is_premium, get_settings, get_size, temp, 
@@ -97,9 +100,11 @@ async def start(client, message):
                 # ✅ CRITICAL FIX: अगर File ID में "_" हुआ तो यह उसे तोड़ देगा।
                 # join का उपयोग करके उसे वापस जोड़ना जरूरी है।
                 file_id = "_".join(parts[2:])
+                # filep_ / filec_ / filea_ → tier hint (plain file_ = unknown)
+                tier = CODE_TIERS.get(parts[0].removeprefix("file"))
                 
                 # Async DB Calls
-                file = await get_file_details(file_id)
+                file = await get_file_details(file_id, tier)
                 if not file:
                     return await message.reply("❌ File Not Found!")
                 
@@ -168,6 +173,23 @@ async def stats(_, message):
     
     # Accessing collection directly from DB instance
     premium = await db.premium.count_documents({"status.premium": True})
+    cache = search_cache.stats()
+
+    engine = ""
+    if MEMORY_INDEX:
+        mi = memory_index.stats()
+        engine = (
+            f"🧠 <b>Memory Index:</b> `{'Ready' if mi['ready'] else 'Building'}`\n"
+            f" • Files: `{mi['docs']}` | Tokens: `{mi['tokens']}`\n"
+            f" • RAM: `{get_size(mi['memory'])}` | Build: `{mi['build_time']:.1f}s`\n\n"
+        )
+    if SPELL_CHECK:
+        sc = spell_checker.stats()
+        engine += (
+            f"🔤 <b>Spell Dictionary:</b>\n"
+            f" • Words: `{sc['words']}` | Deletes: `{sc['deletes']}`\n"
+            f" • RAM: `{get_size(sc['memory'])}`\n\n"
+        )
 
     text = f"""
 📊 <b>Bot Statistics</b>
@@ -181,7 +203,11 @@ async def stats(_, message):
  • Cloud: `{files['cloud']}`
  • Archive: `{files['archive']}`
 
-⏱ <b>Uptime:</b> `{get_readable_time(time_now() - temp.START_TIME)}`
+🧊 <b>Search Cache:</b> `{cache['size']}/{cache['max_size']}`
+ • Hits: `{cache['hits']}` | Misses: `{cache['misses']}`
+ • Hit Rate: `{cache['hit_rate']:.1f}%`
+
+{engine}⏱ <b>Uptime:</b> `{get_readable_time(time_now() - temp.START_TIME)}`
 """
     await msg.edit(text)
 
@@ -235,6 +261,16 @@ async def confirm_del(client, query):
     count = await delete_files("*", storage)
     await query.message.edit(f"✅ Deleted `{count}` files from `{storage}`.")
 
+# ─────────────────────────
+# /backfill_tags COMMAND
+# ─────────────────────────
+@Client.on_message(filters.command("backfill_tags") & filters.user(ADMINS))
+async def backfill_tags_cmd(client, message):
+    msg = await message.reply("🏷️ Tagging old files (language / quality / year / season)...")
+    start = time_now()
+    count = await backfill_tags()
+    await msg.edit(f"✅ Tagged `{count}` files in `{get_readable_time(time_now() - start)}`.")
+
 # ─────────────────────────
 # CALLBACKS
 # ─────────────────────────
@@ -6,21 +6,37 @@ from hydrogram import Client, filters, enums
 from hydrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 # ✅ Updated Imports (Ensure these exist)
-from info import ADMINS, DELETE_TIME, MAX_BTN, IS_PREMIUM, PICS
+from info import ADMINS, DELETE_TIME, MAX_BTN, IS_PREMIUM, PICS, SPELL_CHECK
 from utils import is_premium, get_size, is_check_admin, temp, get_settings, save_group_settings
-from database.ia_filterdb import get_search_results # डेटाबेस फाइल से सर्च फंक्शन
+from database.ia_filterdb import get_search_results, correct_query, file_start_payload # डेटाबेस फाइल से सर्च फंक्शन
 
 # ─────────────────────────────────────────────
 # ⚡ GLOBAL CACHE (Auto-Cleaner)
 # ─────────────────────────────────────────────
 BUTTONS = {}
+# Keyset tokens: key -> {(source, offset): (score, _id)} of the page before `offset`
+SEEK = {}
 
 def check_cache_limit():
     """Koyeb RAM Saver: Clears cache if it gets too big"""
     if len(BUTTONS) > 500:  # 1000 थोड़ा ज्यादा हो सकता है, 500 सेफ है
         BUTTONS.clear()
+        SEEK.clear()
         temp.FILES.clear()
 
+def save_seek(key, source, next_offset, files):
+    """Remember where the next page starts (last score + _id of this page)"""
+    if not next_offset or not files or "score" not in files[-1]:
+        return
+    SEEK.setdefault(key, {})[(source, next_offset)] = (files[-1]["score"], files[-1]["_id"])
+
+def fmt_total(total, capped=False):
+    """Total + page count labels ('1000+' when the DB count was capped)"""
+    total_pages = math.ceil(total / MAX_BTN)
+    if capped:
+        return f"{total}+", f"{total_pages}+"
+    return str(total), str(total_pages)
+
 # ─────────────────────────────────────────────
 # 🛠️ VALIDATOR
 # ─────────────────────────────────────────────
@@ -68,7 +84,9 @@ async def pm_search(client, message):
 # ─────────────────────────────────────────────
 # 🔍 GROUP SEARCH
 # ─────────────────────────────────────────────
-@Client.on_message(filters.group & filters.text & filters.incoming)
+# Commands are left to their own handlers – in the same handler group the
+# first match wins, so /search and /spellcheck would never be reached
+@Client.on_message(filters.group & filters.text & filters.incoming & ~filters.regex(r"^/"))
 async def group_search(client, message):
     if not await is_valid_search(message):
         return
@@ -131,6 +149,18 @@ async def search_toggle(client, message):
     await save_group_settings(message.chat.id, "search_enabled", state)
     await message.reply(f"✅ Search is now **{'ENABLED' if state else 'DISABLED'}**")
 
+@Client.on_message(filters.command("spellcheck") & filters.group)
+async def spell_toggle(client, message):
+    if not await is_check_admin(client, message.chat.id, message.from_user.id):
+        return
+
+    if len(message.command) < 2:
+        return await message.reply("Usage: `/spellcheck on` or `/spellcheck off`")
+
+    state = message.command[1].lower() == "on"
+    await save_group_settings(message.chat.id, "spell_check", state)
+    await message.reply(f"✅ Spell Check is now **{'ENABLED' if state else 'DISABLED'}**")
+
 # ─────────────────────────────────────────────
 # 🚀 AUTO FILTER CORE
 # ─────────────────────────────────────────────
@@ -138,12 +168,25 @@ async def auto_filter(client, msg, collection_type="all"):
     check_cache_limit() 
 
     search = msg.text.strip()
-    
+    settings = await get_settings(msg.chat.id)
+
+    # 🔤 Typo fix before hitting the DB (words seen at index time are kept as-is)
+    raw = search
+    if SPELL_CHECK and settings.get("spell_check", SPELL_CHECK):
+        search = correct_query(search) or search
+
     # ⚡ DB Call
-    files, next_offset, total, actual_source = await get_search_results(
+    files, next_offset, total, actual_source, capped = await get_search_results(
         search, max_results=MAX_BTN, offset=0, collection_type=collection_type
     )
 
+    # Correction led nowhere -> the query exactly as typed
+    if not files and search != raw:
+        search = raw
+        files, next_offset, total, actual_source, capped = await get_search_results(
+            search, max_results=MAX_BTN, offset=0, collection_type=collection_type
+        )
+
     if not files:
         try:
             # Send and auto-delete "Not Found"
@@ -157,12 +200,13 @@ async def auto_filter(client, msg, collection_type="all"):
     key = f"{msg.chat.id}-{msg.id}"
     temp.FILES[key] = files
     BUTTONS[key] = search
+    save_seek(key, actual_source, next_offset, files)
 
     # ⚡ Link Generation
     list_items = []
     for file in files:
         # यहाँ हम _id (Unique ID with access_hash) का उपयोग कर रहे हैं जो सुरक्षित है
-        f_link = f"https://t.me/{temp.U_NAME}?start=file_{msg.chat.id}_{file['_id']}"
+        f_link = f"https://t.me/{temp.U_NAME}?start={file_start_payload(msg.chat.id, file)}"
         
         # फाइल का नाम और साइज
         list_items.append(
@@ -170,11 +214,11 @@ async def auto_filter(client, msg, collection_type="all"):
         )
     
     files_text = "\n\n".join(list_items)
-    total_pages = math.ceil(total / MAX_BTN)
+    total_text, total_pages = fmt_total(total, capped)
     
     cap = (
         f"<b>👑 Search: {search}\n"
-        f"🎬 Total: {total}\n"
+        f"🎬 Total: {total_text}\n"
         f"📚 Source: {actual_source.upper()}\n"
         f"📄 Page: 1/{total_pages}</b>\n\n"
         f"{files_text}"
@@ -201,7 +245,6 @@ async def auto_filter(client, msg, collection_type="all"):
         m = await msg.reply(cap, reply_markup=InlineKeyboardMarkup(btn), disable_web_page_preview=True, quote=True)
         
         # Auto Delete Logic
-        settings = await get_settings(msg.chat.id)
         if settings.get("auto_delete"):
             asyncio.create_task(auto_delete_msg(m, msg))
     except Exception as e:
@@ -233,25 +276,28 @@ async def nav_handler(client, query):
     if not search:
         return await query.answer("❌ Search Expired! Search again.", show_alert=True)
 
-    files, next_off, total, act_src = await get_search_results(
-        search, max_results=MAX_BTN, offset=int(offset), collection_type=coll_type
+    # ⚡ Keyset token (falls back to skip/offset if unknown, e.g. after restart)
+    after = SEEK.get(key, {}).get((coll_type, int(offset)))
+    files, next_off, total, act_src, capped = await get_search_results(
+        search, max_results=MAX_BTN, offset=int(offset), collection_type=coll_type, after=after
     )
     if not files: return await query.answer("❌ No more pages!", show_alert=True)
 
     temp.FILES[key] = files
+    save_seek(key, act_src, next_off, files)
 
     list_items = []
     for file in files:
-        f_link = f"https://t.me/{temp.U_NAME}?start=file_{query.message.chat.id}_{file['_id']}"
+        f_link = f"https://t.me/{temp.U_NAME}?start={file_start_payload(query.message.chat.id, file)}"
         list_items.append(f"📁 <a href='{f_link}'>[{get_size(file['file_size'])}] {file['file_name']}</a>")
     
     files_text = "\n\n".join(list_items)
-    total_pages = math.ceil(total / MAX_BTN)
+    total_text, total_pages = fmt_total(total, capped)
     curr_page = (int(offset) // MAX_BTN) + 1
     
     cap = (
         f"<b>👑 Search: {search}\n"
-        f"🎬 Total: {total}\n"
+        f"🎬 Total: {total_text}\n"
         f"📚 Source: {act_src.upper()}\n"
         f"📄 Page: {curr_page}/{total_pages}</b>\n\n"
         f"{files_text}"
@@ -303,25 +349,26 @@ async def coll_handler(client, query):
     if not search:
         return await query.answer("❌ Search Expired!", show_alert=True)
 
-    files, next_off, total, act_src = await get_search_results(
+    files, next_off, total, act_src, capped = await get_search_results(
         search, max_results=MAX_BTN, offset=0, collection_type=coll_type
     )
     if not files:
         return await query.answer(f"❌ No files in {coll_type.upper()}", show_alert=True)
 
     temp.FILES[key] = files
+    save_seek(key, act_src, next_off, files)
 
     list_items = []
     for file in files:
-        f_link = f"https://t.me/{temp.U_NAME}?start=file_{query.message.chat.id}_{file['_id']}"
+        f_link = f"https://t.me/{temp.U_NAME}?start={file_start_payload(query.message.chat.id, file)}"
         list_items.append(f"📁 <a href='{f_link}'>[{get_size(file['file_size'])}] {file['file_name']}</a>")
     
     files_text = "\n\n".join(list_items)
-    total_pages = math.ceil(total / MAX_BTN)
+    total_text, total_pages = fmt_total(total, capped)
     
     cap = (
         f"<b>👑 Search: {search}\n"
-        f"🎬 Total: {total}\n"
+        f"🎬 Total: {total_text}\n"
         f"📚 Source: {act_src.upper()}\n"
         f"📄 Page: 1/{total_pages}</b>\n\n"
         f"{files_text}"
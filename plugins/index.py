@@ -1,15 +1,116 @@
 import re
 import time
 import asyncio
+import logging
+import secrets
 from hydrogram import Client, filters, enums
 from hydrogram.errors import FloodWait
-from info import ADMINS
+from info import ADMINS, INDEX_CHECKPOINT_SECS, INDEX_CONCURRENCY, INDEX_RPS, INDEX_PROGRESS_SECS
 # ✅ Updated Import
-from database.ia_filterdb import save_file
+from database.ia_filterdb import (
+    BulkSaver, create_index_job, checkpoint_index_job, set_index_job_status,
+    get_index_job, get_running_index_jobs, get_index_mark, set_index_mark,
+    load_file_keys
+)
 from hydrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from utils import temp, get_readable_time
+from utils import get_readable_time, FloodBudget
 
-lock = asyncio.Lock()
+logger = logging.getLogger(__name__)
+
+COUNTERS = ("total_files", "duplicate", "errors", "deleted", "no_media", "unsupported", "badfiles")
+
+# ─────────────────────────────────────────────
+# 🗓️ INDEX JOB SCHEDULER
+# ─────────────────────────────────────────────
+class IndexJobState:
+    def __init__(self, job_id, chat, collection_type):
+        self.id = job_id
+        self.chat = chat
+        self.collection_type = collection_type
+        self.cancelled = False
+        self.running = False
+        self.task = None        # set while waiting for a slot (cancelled directly)
+
+
+class IndexScheduler:
+    """
+    Runs up to `limit` index jobs at once (others wait in FIFO order),
+    with a per-job cancel flag and one FloodWait-aware fetch budget
+    shared by all jobs so parallel runs don't trip Telegram limits.
+    """
+
+    def __init__(self, limit, rate):
+        self.slots = asyncio.Semaphore(max(limit, 1))
+        self.budget = FloodBudget(rate)
+        self.jobs = {}
+        self.reserved = set()   # chats claimed by a handler, job not registered yet
+
+    def reserve(self, chat):
+        """Claim `chat` synchronously (no await between is_busy and this)"""
+        self.reserved.add(str(chat))
+
+    def release(self, chat):
+        self.reserved.discard(str(chat))
+
+    def register(self, job_id, chat, collection_type):
+        state = IndexJobState(job_id, chat, collection_type)
+        self.jobs[job_id] = state
+        # The job now holds the chat – hand over the reservation
+        self.release(chat)
+        return state
+
+    def unregister(self, job_id):
+        self.jobs.pop(job_id, None)
+
+    def is_busy(self, chat):
+        return str(chat) in self.reserved or any(str(j.chat) == str(chat) for j in self.jobs.values())
+
+    def cancel(self, job_id):
+        state = self.jobs.get(job_id)
+        if state:
+            state.cancelled = True
+            # Still waiting for a slot -> stop waiting (running jobs see the flag)
+            if not state.running and state.task:
+                state.task.cancel()
+        return bool(state)
+
+    def spawn(self, coro):
+        """Run a job in the background so the callback handler returns"""
+        task = asyncio.create_task(coro)
+        task.add_done_callback(self._log_failure)
+        return task
+
+    @staticmethod
+    def _log_failure(task):
+        if not task.cancelled() and task.exception():
+            logger.error(f"Index job crashed: {task.exception()}")
+
+
+scheduler = IndexScheduler(INDEX_CONCURRENCY, INDEX_RPS)
+
+async def ask_collection(msg, chat, lst_msg_id, skip):
+    """Collection picker – skip = 'inc' starts from each tier's high-water mark"""
+    buttons = [
+        [
+            InlineKeyboardButton('✅ PRIMARY', callback_data=f'index#start#{chat}#{lst_msg_id}#{skip}#primary'),
+            InlineKeyboardButton('📂 CLOUD', callback_data=f'index#start#{chat}#{lst_msg_id}#{skip}#cloud')
+        ],
+        [
+            InlineKeyboardButton('📦 ARCHIVES', callback_data=f'index#start#{chat}#{lst_msg_id}#{skip}#archive')
+        ],
+        [
+            InlineKeyboardButton('❌ CANCEL', callback_data='close_data')
+        ]
+    ]
+    mode = "🔁 Incremental (new messages only)" if skip == "inc" else f"⏭️ Skip: <code>{skip}</code>"
+    await msg.edit(
+        f"🗂️ <b>Select Collection to Index:</b>\n"
+        f"{mode}\n\n"
+        "• <b>PRIMARY</b> - Main database\n"
+        "• <b>CLOUD</b> - Cloud storage\n"
+        "• <b>ARCHIVES</b> - Archive storage",
+        reply_markup=InlineKeyboardMarkup(buttons)
+    )
 
 @Client.on_callback_query(filters.regex(r'^index'))
 async def index_files(bot, query):
@@ -22,26 +123,7 @@ async def index_files(bot, query):
         lst_msg_id = data_parts[3]
         skip = data_parts[4]
         
-        buttons = [
-            [
-                InlineKeyboardButton('✅ PRIMARY', callback_data=f'index#start#{chat}#{lst_msg_id}#{skip}#primary'),
-                InlineKeyboardButton('📂 CLOUD', callback_data=f'index#start#{chat}#{lst_msg_id}#{skip}#cloud')
-            ],
-            [
-                InlineKeyboardButton('📦 ARCHIVES', callback_data=f'index#start#{chat}#{lst_msg_id}#{skip}#archive')
-            ],
-            [
-                InlineKeyboardButton('❌ CANCEL', callback_data='close_data')
-            ]
-        ]
-        await query.message.edit(
-            f"🗂️ <b>Select Collection to Index:</b>\n"
-            f"⏭️ Skip: <code>{skip}</code>\n\n"
-            "• <b>PRIMARY</b> - Main database\n"
-            "• <b>CLOUD</b> - Cloud storage\n"
-            "• <b>ARCHIVES</b> - Archive storage",
-            reply_markup=InlineKeyboardMarkup(buttons)
-        )
+        await ask_collection(query.message, chat, lst_msg_id, skip)
         
     elif ident == 'ask_skip':
         # Manual Skip Selection
@@ -58,27 +140,12 @@ async def index_files(bot, query):
             return await query.message.edit("❌ Invalid number or Timeout. Try again.")
             
         # After getting skip, show collection buttons
-        buttons = [
-            [
-                InlineKeyboardButton('✅ PRIMARY', callback_data=f'index#start#{chat}#{lst_msg_id}#{skip}#primary'),
-                InlineKeyboardButton('📂 CLOUD', callback_data=f'index#start#{chat}#{lst_msg_id}#{skip}#cloud')
-            ],
-            [
-                InlineKeyboardButton('📦 ARCHIVES', callback_data=f'index#start#{chat}#{lst_msg_id}#{skip}#archive')
-            ],
-            [
-                InlineKeyboardButton('❌ CANCEL', callback_data='close_data')
-            ]
-        ]
-        await query.message.edit(
-            f"🗂️ <b>Select Collection to Index:</b>\n"
-            f"⏭️ Skip: <code>{skip}</code>\n\n"
-            "• <b>PRIMARY</b> - Main database\n"
-            "• <b>CLOUD</b> - Cloud storage\n"
-            "• <b>ARCHIVES</b> - Archive storage",
-            reply_markup=InlineKeyboardMarkup(buttons)
-        )
+        await ask_collection(query.message, chat, lst_msg_id, skip)
     
+    elif ident == 'inc':
+        # Incremental: only messages after the last indexed id of the chosen tier
+        await ask_collection(query.message, data_parts[2], data_parts[3], "inc")
+
     elif ident == 'start':
         # Start indexing with selected collection
         chat = data_parts[2]
@@ -87,18 +154,49 @@ async def index_files(bot, query):
         collection = data_parts[5]
         
         msg = query.message
-        await msg.edit(f"Starting Indexing to <b>{collection.upper()}</b> collection...")
-        
         try:
             chat = int(chat)
         except:
             chat = chat
-        
-        await index_files_to_db(int(lst_msg_id), chat, msg, bot, int(skip), collection)
+
+        # Check + reserve before the first await – a double tap must not start two jobs
+        if scheduler.is_busy(chat):
+            return await msg.edit("⏳ This channel is already being indexed.")
+        scheduler.reserve(chat)
+
+        try:
+            await msg.edit(f"Starting Indexing to <b>{collection.upper()}</b> collection...")
+            if skip == "inc":
+                skip = await get_index_mark(chat, collection) + 1
+                if skip >= int(lst_msg_id):
+                    scheduler.release(chat)
+                    return await msg.edit(f"✅ <b>{collection.upper()}</b> is already up to date (last indexed: <code>{skip - 1}</code>).")
+                await msg.edit(f"🔁 Incremental indexing to <b>{collection.upper()}</b> from message <code>{skip}</code>...")
+        except:
+            scheduler.release(chat)
+            raise
+
+        scheduler.spawn(index_files_to_db(int(lst_msg_id), chat, msg, bot, int(skip), collection))
     
     elif ident == 'cancel':
-        temp.CANCEL = True
-        await query.message.edit("Trying to cancel Indexing...")
+        if scheduler.cancel(data_parts[2]):
+            await query.message.edit("Trying to cancel Indexing...")
+        else:
+            await query.answer("❌ Job is not running.", show_alert=True)
+
+    elif ident == 'resume':
+        job = await get_index_job(data_parts[2])
+        if not job or job["status"] == "done" or job["_id"] in scheduler.jobs:
+            return await query.answer("❌ Job not found or already running / finished.", show_alert=True)
+        if scheduler.is_busy(job["chat"]):
+            return await query.answer("⏳ This channel is already being indexed.", show_alert=True)
+        scheduler.reserve(job["chat"])
+        try:
+            await query.message.edit_reply_markup(None)
+        except:
+            scheduler.release(job["chat"])
+            raise
+        scheduler.spawn(resume_index_job(bot, job))
 
 
 # Auto-index when forwarded message or channel link is sent
@@ -109,9 +207,6 @@ async def auto_index(bot, message):
         if not message.forward_from_chat:
             return
     
-    if lock.locked():
-        return await message.reply('⏳ Wait until previous indexing process completes.')
-    
     # Handle forwarded messages
     if message.forward_from_chat and message.forward_from_chat.type == enums.ChatType.CHANNEL:
         last_msg_id = message.forward_from_message_id
@@ -138,6 +233,9 @@ async def auto_index(bot, message):
     if chat.type != enums.ChatType.CHANNEL:
         return await message.reply("⚠️ I can only index channels.")
 
+    # Numeric id from here on – index marks / deletions are keyed by it
+    chat_id = chat.id
+
     # Show Initial Options (Direct Skip 0 OR Custom Skip)
     buttons = [
         [
@@ -146,6 +244,9 @@ async def auto_index(bot, message):
         [
             InlineKeyboardButton('📝 CUSTOM SKIP', callback_data=f'index#ask_skip#{chat_id}#{last_msg_id}')
         ],
+        [
+            InlineKeyboardButton('🔁 INCREMENTAL', callback_data=f'index#inc#{chat_id}#{last_msg_id}')
+        ],
         [
             InlineKeyboardButton('❌ CANCEL', callback_data='close_data')
         ]
@@ -159,116 +260,217 @@ async def auto_index(bot, message):
     )
 
 
-async def index_files_to_db(lst_msg_id, chat, msg, bot, skip, collection_type="primary"):
-    start_time = time.time()
-    total_files = 0
-    duplicate = 0
-    errors = 0
-    deleted = 0
-    no_media = 0
-    unsupported = 0
-    badfiles = 0
+def index_stats_text(title, collection_type, time_taken, c, current=None):
+    text = (
+        f"<b>{title}</b>\n"
+        f"📚 Collection: <code>{collection_type.upper()}</code>\n"
+        f"⏱ Time: <code>{time_taken}</code>\n\n"
+    )
+    if current is not None:
+        text += f"📨 Total Received: <code>{current}</code>\n"
+    return text + (
+        f"📁 Saved Files: <code>{c['total_files']}</code>\n"
+        f"🔄 Duplicates: <code>{c['duplicate']}</code>\n"
+        f"🗑 Deleted: <code>{c['deleted']}</code>\n"
+        f"❌ No Media: <code>{c['no_media'] + c['unsupported']}</code>\n"
+        f"⚠️ Unsupported: <code>{c['unsupported']}</code>\n"
+        f"❗ Errors: <code>{c['errors']}</code>\n"
+        f"🚫 Bad Files: <code>{c['badfiles']}</code>"
+    )
+
+
+async def index_files_to_db(lst_msg_id, chat, msg, bot, skip, collection_type="primary", job=None):
+    """
+    Index messages skip..lst_msg_id of `chat` into `collection_type`.
+    Progress is checkpointed to IndexJobs so a crash / restart resumes
+    from the last flushed message instead of the beginning.
+    """
+    # 🔖 High-water mark: only advanced when this run continues the indexed range
+    # (a custom skip past the mark would otherwise hide the gap from incremental runs).
+    # Looked up before register() – nothing may fail between that and the try/finally.
+    try:
+        mark = await get_index_mark(chat, collection_type)
+        # mark 0 = nothing indexed yet: only a run from the start (0/1) opens the range
+        track_mark = skip <= mark + 1
+
+        if job is None:
+            job = {"_id": secrets.token_hex(4), "counters": {}}
+            await create_index_job(job["_id"], chat, lst_msg_id, skip, collection_type, msg.chat.id)
+        else:
+            await set_index_job_status(job["_id"], "running")
+    except:
+        # Never registered -> free the chat reserved by the callback
+        scheduler.release(chat)
+        raise
+    job_id = job["_id"]
+    state = scheduler.register(job_id, chat, collection_type)
+
+    c = dict.fromkeys(COUNTERS, 0)
+    c.update(job.get("counters") or {})
     current = skip
+    # ⚡ Batched upserts (one bulk_write per INDEX_BATCH_SIZE files)
+    saver = BulkSaver(collection_type)
+    saver.suc, saver.dup, saver.err = c["total_files"], c["duplicate"], c["errors"]
+
+    def sync_counters():
+        c["total_files"], c["duplicate"], c["errors"] = saver.suc, saver.dup, saver.err
+
+    async def save_progress():
+        """Flush + checkpoint (+ mark). `current` is the next id to fetch"""
+        await saver.flush()
+        sync_counters()
+        await checkpoint_index_job(job_id, current, c)
+        if track_mark and current > skip:
+            await set_index_mark(chat, collection_type, current - 1)
     
-    async with lock:
+    if scheduler.slots.locked():
+        btn = [[InlineKeyboardButton('CANCEL', callback_data=f'index#cancel#{job_id}')]]
+        try: await msg.edit(f"⏳ Queued – {INDEX_CONCURRENCY} index job(s) already running...", reply_markup=InlineKeyboardMarkup(btn))
+        except: pass
+
+    async def report_progress():
+        """
+        Progress edits on a timer, in their own task – the indexing loop
+        never waits on Telegram (an edit FloodWait only delays the next edit).
+        """
+        btn = InlineKeyboardMarkup([[
+            InlineKeyboardButton('CANCEL', callback_data=f'index#cancel#{job_id}')
+        ]])
+        start_files = saver.suc + saver.dup + saver.err
+        while True:
+            await asyncio.sleep(INDEX_PROGRESS_SECS)
+            sync_counters()
+            elapsed = max(time.time() - start_time, 1e-6)
+            msg_rate = (current - skip) / elapsed
+            file_rate = (saver.suc + saver.dup + saver.err - start_files) / elapsed
+            eta = (lst_msg_id - current) / msg_rate if msg_rate else 0
+            text = index_stats_text("📊 Indexing Progress", collection_type, get_readable_time(elapsed), c, current)
+            text += (
+                f"\n\n⚡ Speed: <code>{msg_rate:.1f}</code> msg/s • <code>{file_rate:.1f}</code> files/s\n"
+                f"💾 DB Writes: <code>{saver.writes / elapsed:.2f}</code>/s\n"
+                f"⏳ ETA: <code>{get_readable_time(eta) if msg_rate else '-'}</code>"
+            )
+            backoff = scheduler.budget.backoff
+            if backoff:
+                text += f"\n🐢 FloodWait: <code>{backoff:.0f}s</code>"
+            try:
+                await msg.edit_text(text=text, reply_markup=btn)
+            except FloodWait as e:
+                await asyncio.sleep(e.value)
+            except Exception:
+                pass
+
+    # Only the slot wait is cancellable from outside; running jobs poll the flag
+    state.task = asyncio.current_task()
+    try:
+        await scheduler.slots.acquire()
+    except asyncio.CancelledError:
+        scheduler.unregister(job_id)
+        if not state.cancelled:
+            raise   # Shutdown – job stays "running" and resumes on restart
+        await set_index_job_status(job_id, "cancelled")
+        try: await msg.edit("✅ Queued indexing cancelled.")
+        except: pass
+        return
+
+    try:
+        state.task = None
+        state.running = True
+        start_time = last_checkpoint = time.time()
+        reporter = asyncio.create_task(report_progress())
         try:
-            async for message in bot.iter_messages(chat, lst_msg_id, skip):
-                time_taken = get_readable_time(time.time()-start_time)
-                
-                if temp.CANCEL:
-                    temp.CANCEL = False
-                    await msg.edit(
-                        f"<b>✅ Successfully Cancelled!</b>\n"
-                        f"📚 Collection: <code>{collection_type.upper()}</code>\n"
-                        f"⏱ Completed in: <code>{time_taken}</code>\n\n"
-                        f"📁 Saved Files: <code>{total_files}</code>\n"
-                        f"🔄 Duplicates: <code>{duplicate}</code>\n"
-                        f"🗑 Deleted: <code>{deleted}</code>\n"
-                        f"❌ No Media: <code>{no_media + unsupported}</code>\n"
-                        f"⚠️ Unsupported: <code>{unsupported}</code>\n"
-                        f"❗ Errors: <code>{errors}</code>\n"
-                        f"🚫 Bad Files: <code>{badfiles}</code>"
-                    )
+            # 🌸 Cross-tier dedupe filter (no-op once loaded)
+            await load_file_keys()
+            async for message in bot.iter_messages(chat, lst_msg_id, skip, budget=scheduler.budget):
+                if state.cancelled:
+                    await save_progress()
+                    await set_index_job_status(job_id, "cancelled")
+                    reporter.cancel()
+                    time_taken = get_readable_time(time.time()-start_time)
+                    await msg.edit(index_stats_text("✅ Successfully Cancelled!", collection_type, time_taken, c))
                     return
+
+                # 📌 Checkpoint: flush first so `current` never runs ahead of the DB
+                if time.time() - last_checkpoint >= INDEX_CHECKPOINT_SECS:
+                    await save_progress()
+                    last_checkpoint = time.time()
                 
                 current += 1
                 
-                # Update progress every 50 messages (Less spam)
-                if current % 50 == 0:
-                    btn = [[
-                        InlineKeyboardButton('CANCEL', callback_data=f'index#cancel#{chat}#{lst_msg_id}#{skip}')
-                    ]]
-                    try:
-                        await msg.edit_text(
-                            text=f"<b>📊 Indexing Progress</b>\n"
-                            f"📚 Collection: <code>{collection_type.upper()}</code>\n"
-                            f"⏱ Time: <code>{time_taken}</code>\n\n"
-                            f"📨 Total Received: <code>{current}</code>\n"
-                            f"📁 Saved: <code>{total_files}</code>\n"
-                            f"🔄 Duplicates: <code>{duplicate}</code>\n"
-                            f"🗑 Deleted: <code>{deleted}</code>\n"
-                            f"❌ No Media: <code>{no_media + unsupported}</code>\n"
-                            f"⚠️ Unsupported: <code>{unsupported}</code>\n"
-                            f"❗ Errors: <code>{errors}</code>\n"
-                            f"🚫 Bad Files: <code>{badfiles}</code>", 
-                            reply_markup=InlineKeyboardMarkup(btn)
-                        )
-                    except FloodWait as e:
-                        await asyncio.sleep(e.value)
-                    except Exception:
-                        pass
-                
                 if message.empty:
-                    deleted += 1
+                    c["deleted"] += 1
                     continue
                 elif not message.media:
-                    no_media += 1
+                    c["no_media"] += 1
                     continue
                 elif message.media not in [enums.MessageMediaType.VIDEO, enums.MessageMediaType.DOCUMENT]:
-                    unsupported += 1
+                    c["unsupported"] += 1
                     continue
                 
                 media = getattr(message, message.media.value, None)
                 if not media:
-                    unsupported += 1
+                    c["unsupported"] += 1
                     continue
                 
                 # Check file size - skip files under 2 MB
                 file_size = getattr(media, 'file_size', 0)
                 if file_size < 2097152:  # 2 MB in bytes
-                    badfiles += 1
+                    c["badfiles"] += 1
                     continue
                 
                 media.caption = message.caption
+                media.chat_id = message.chat.id
+                media.msg_id = message.id
                 # ✅ Safe Name Cleaning (No Error)
                 try:
                     media.file_name = re.sub(r"@\w+|(_|\-|\.|\+)", " ", str(media.file_name))
                 except:
                     pass
                 
-                # Save to selected collection
-                sts = await save_file(media, collection_type=collection_type)
-                
-                if sts == 'suc':
-                    total_files += 1
-                elif sts == 'dup':
-                    duplicate += 1
-                elif sts == 'err':
-                    errors += 1
+                # Queue for the selected collection (flushed in batches)
+                await saver.add(media)
                     
         except Exception as e:
-            await msg.reply(f'❌ Index canceled due to Error - {e}')
+            reporter.cancel()
+            # Keep whatever was already queued + remember where we stopped
+            try:
+                await save_progress()
+                await set_index_job_status(job_id, "failed")
+            except Exception:
+                pass
+            btn = [[InlineKeyboardButton('🔁 RESUME', callback_data=f'index#resume#{job_id}')]]
+            await msg.reply(f'❌ Index canceled due to Error - {e}', reply_markup=InlineKeyboardMarkup(btn))
         else:
+            await save_progress()
+            await set_index_job_status(job_id, "done")
+            reporter.cancel()
             time_taken = get_readable_time(time.time()-start_time)
-            await msg.edit(
-                f'<b>✅ Successfully Indexed!</b>\n'
-                f'📚 Collection: <code>{collection_type.upper()}</code>\n'
-                f'⏱ Completed in: <code>{time_taken}</code>\n\n'
-                f'📁 Saved Files: <code>{total_files}</code>\n'
-                f'🔄 Duplicates: <code>{duplicate}</code>\n'
-                f'🗑 Deleted: <code>{deleted}</code>\n'
-                f'❌ No Media: <code>{no_media + unsupported}</code>\n'
-                f'⚠️ Unsupported: <code>{unsupported}</code>\n'
-                f'❗ Errors: <code>{errors}</code>\n'
-                f'🚫 Bad Files: <code>{badfiles}</code>'
-            )
+            await msg.edit(index_stats_text("✅ Successfully Indexed!", collection_type, time_taken, c))
+        finally:
+            reporter.cancel()
+            scheduler.unregister(job_id)
+    finally:
+        scheduler.slots.release()
+
+
+async def resume_index_job(bot, job):
+    """Continue a persisted job from its last checkpoint"""
+    try:
+        chat = int(job["chat"])
+    except (TypeError, ValueError):
+        chat = job["chat"]
+    try:
+        msg = await bot.send_message(
+            job["status_chat"],
+            f"🔁 Resuming indexing to <b>{job['collection'].upper()}</b> from message <code>{job['current']}</code>..."
+        )
+    except:
+        scheduler.release(chat)
+        raise
+    await index_files_to_db(job["lst_msg_id"], chat, msg, bot, job["current"], job["collection"], job)
+
+
+async def resume_index_jobs(bot):
+    """Called on Bot.start – picks up jobs interrupted by a crash / restart"""
+    for job in await get_running_index_jobs():
+        scheduler.spawn(resume_index_job(bot, job))
@@ -0,0 +1,130 @@
+"""
+Index snapshots – move a tier between clusters without re-indexing.
+
+    python3 snapshot.py export primary primary.ndjson.gz
+    python3 snapshot.py import primary primary.ndjson.gz --drop
+
+One document per line (bson.json_util), gzip or zstd (*.zst, needs the
+`zstandard` package). Uses the same env / DATABASE_URL as bot.py.
+"""
+import io
+import sys
+import gzip
+import time
+import asyncio
+import logging
+import argparse
+from bson import json_util
+from pymongo.errors import BulkWriteError
+from database.ia_filterdb import COLLECTIONS, file_keys, ensure_indexes
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# FileKeys travels with the tiers so cross-tier dedupe survives a restore
+TARGETS = {**COLLECTIONS, "filekeys": file_keys}
+
+# ─────────────────────────────────────────
+# 🗜️ COMPRESSED NDJSON FILES
+# ─────────────────────────────────────────
+def open_snapshot(path, mode):
+    """Text-mode handle; codec from the extension (.zst = zstd, else gzip)"""
+    if path.endswith(".zst"):
+        if zstandard is None:
+            sys.exit("❌ zstd snapshots need: pip install zstandard")
+        raw = open(path, mode + "b")
+        if mode == "w":
+            stream = zstandard.ZstdCompressor(level=3).stream_writer(raw)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=6)
+
+# ─────────────────────────────────────────
+# 📤 EXPORT
+# ─────────────────────────────────────────
+async def export_tier(name, path, batch_size):
+    col = TARGETS[name]
+    start, count = time.time(), 0
+    with open_snapshot(path, "w") as f:
+        # Cursor batches keep memory bounded whatever the tier size
+        async for doc in col.find({}).batch_size(batch_size):
+            f.write(json_util.dumps(doc))
+            f.write("\n")
+            count += 1
+            if count % 100000 == 0:
+                logger.info(f"📤 {count} docs...")
+    logger.info(f"✅ Exported {count} docs from {name} in {time.time() - start:.1f}s")
+
+# ─────────────────────────────────────────
+# 📥 IMPORT
+# ─────────────────────────────────────────
+async def _insert(col, batch):
+    """insert_many, existing _ids are skipped (re-running an import is safe)"""
+    try:
+        res = await col.insert_many(batch, ordered=False)
+        return len(res.inserted_ids), 0
+    except BulkWriteError as e:
+        details = e.details
+        return details.get("nInserted", 0), len(details.get("writeErrors", []))
+
+async def import_tier(name, path, batch_size, drop):
+    col = TARGETS[name]
+    if drop:
+        # Also drops the indexes – rebuilt once at the end instead of per insert
+        await col.drop()
+    start, inserted, skipped = time.time(), 0, 0
+    pending = None
+    batch = []
+    with open_snapshot(path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            batch.append(json_util.loads(line))
+            if len(batch) >= batch_size:
+                # Parse the next batch while this one is written
+                if pending:
+                    ok, dup = await pending
+                    inserted, skipped = inserted + ok, skipped + dup
+                pending = asyncio.create_task(_insert(col, batch))
+                # Let the task send its insert before the loop goes back to parsing
+                await asyncio.sleep(0)
+                batch = []
+        if pending:
+            ok, dup = await pending
+            inserted, skipped = inserted + ok, skipped + dup
+        if batch:
+            ok, dup = await _insert(col, batch)
+            inserted, skipped = inserted + ok, skipped + dup
+    logger.info(f"✅ Imported {inserted} docs into {name} ({skipped} skipped) in {time.time() - start:.1f}s")
+
+    logger.info("⚡ Building indexes...")
+    await ensure_indexes()
+    logger.info("✅ Indexes ready")
+
+# ─────────────────────────────────────────
+# 🧰 CLI
+# ─────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="Export / import index snapshots")
+    parser.add_argument("action", choices=("export", "import"))
+    parser.add_argument("tier", choices=tuple(TARGETS))
+    parser.add_argument("path", help="*.ndjson.gz or *.ndjson.zst")
+    parser.add_argument("--batch", type=int, default=5000, help="docs per cursor batch / insert_many")
+    parser.add_argument("--drop", action="store_true", help="import: drop the tier first")
+    args = parser.parse_args()
+
+    if args.action == "export":
+        coro = export_tier(args.tier, args.path, args.batch)
+    else:
+        coro = import_tier(args.tier, args.path, args.batch, args.drop)
+    asyncio.run(coro)
+
+
+if __name__ == "__main__":
+    main()
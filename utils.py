@@ -3,6 +3,7 @@ import asyncio
 import re
 import aiohttp
 import os
+import time
 from datetime import datetime, timedelta
 from hydrogram.errors import FloodWait
 from hydrogram import enums
@@ -31,6 +32,41 @@ class temp(object):
     BOT = None
     PREMIUM = {}
     PM_FILES = {}
+    WORKERS = {}        # index -> streaming client (0 = main bot)
+    WORK_LOADS = {}     # index -> streams in flight
+
+# ─────────────────────────────────────────────
+# 🚦 SHARED FLOODWAIT-AWARE RATE BUDGET
+# ─────────────────────────────────────────────
+class FloodBudget:
+    """
+    One request budget shared by every caller (e.g. all index jobs).
+    acquire() spaces calls to `rate` per second and, after a FloodWait
+    reported through flood(), pauses everyone until it has expired.
+    """
+
+    def __init__(self, rate=5):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.paused_until = 0
+        self._next = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def backoff(self):
+        """Seconds left on the current FloodWait (0 if none)"""
+        return max(0, self.paused_until - time.monotonic())
+
+    def flood(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            wait = max(self.paused_until, self._next) - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+                now = time.monotonic()
+            self._next = now + self.interval
 
 # ─────────────────────────────────────────────
 # 👮 ADMIN CHECK
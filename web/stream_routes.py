@@ -1,4 +1,5 @@
 import math
+import time
 import secrets
 import mimetypes
 import logging
@@ -6,7 +7,8 @@ from urllib.parse import quote
 from aiohttp import web
 from info import BIN_CHANNEL
 from utils import temp
-from web.utils.custom_dl import TGCustomYield, chunk_size, offset_fix
+from web.utils.custom_dl import TGCustomYield, chunk_size, offset_fix, chunk_buffer, chunk_cache
+from web.utils.workers import get_worker, workers_status
 from web.utils.render_template import media_watch
 
 routes = web.RouteTableDef()
@@ -162,13 +164,37 @@ async def download_handler(request):
         logger.error(f"Download Error: {e}")
         return web.Response(status=500, text="Internal Server Error")
 
+# ─────────────────────────────────────────────
+# 📊 STATUS ROUTE (WORKERS / CACHES)
+# ─────────────────────────────────────────────
+@routes.get("/status")
+async def status_handler(request):
+    return web.json_response({
+        "uptime": round(time.time() - temp.START_TIME),
+        "workers": workers_status(),
+        "chunk_buffer": chunk_buffer.stats(),
+        "chunk_cache": chunk_cache.stats()
+    })
+
 # ─────────────────────────────────────────────
 # 🚀 CORE STREAMING LOGIC (KOYEB OPTIMIZED)
 # ─────────────────────────────────────────────
 async def media_download(request, message_id: int):
+    # Count the stream against its worker from the moment it is picked, so a
+    # burst of requests spreads out instead of all seeing equal loads
+    worker, client = get_worker()
+    temp.WORK_LOADS[worker] = temp.WORK_LOADS.get(worker, 0) + 1
+    try:
+        return await _media_download(request, message_id, worker, client)
+    finally:
+        temp.WORK_LOADS[worker] -= 1
+
+
+async def _media_download(request, message_id: int, worker: int, client):
+    response = None
     try:
-        # 1. Fetch Message safely
-        media_msg = await temp.BOT.get_messages(BIN_CHANNEL, message_id)
+        # 1. Fetch Message safely (via the chosen worker – file ids are per bot)
+        media_msg = await client.get_messages(BIN_CHANNEL, message_id)
         if not media_msg or not media_msg.media:
             return web.Response(status=404, text="File Not Found")
             
@@ -214,7 +240,7 @@ async def media_download(request, message_id: int):
         part_count = math.ceil(req_length / new_chunk_size)
 
         # 5. Generate Stream Body
-        body = TGCustomYield().yield_file(
+        body = TGCustomYield(worker).yield_file(
             media_msg, offset, first_part_cut, last_part_cut, part_count, new_chunk_size
         )
 
@@ -229,13 +255,27 @@ async def media_download(request, message_id: int):
             "Content-Length": str(req_length)
         }
 
-        return web.Response(
+        # Streamed inside the handler so the worker load lasts as long as the transfer
+        response = web.StreamResponse(
             status=206 if range_header else 200,
-            body=body,
             headers=headers
         )
+        await response.prepare(request)
+        try:
+            async for chunk in body:
+                await response.write(chunk)
+        finally:
+            await body.aclose()     # Cancels the read-ahead on disconnect
+        await response.write_eof()
+        return response
 
     except Exception as e:
         logger.error(f"Stream Error: {e}")
+        if response is not None and response.prepared:
+            # Headers already sent – a clean end would look like a complete
+            # file (or hang on Content-Length), so drop the connection
+            if request.transport is not None:
+                request.transport.close()
+            return response
         return web.Response(status=500, text="Server Error during streaming")
 
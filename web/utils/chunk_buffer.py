@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# ─────────────────────────────────────────────
+# 🧺 SHARED IN-MEMORY CHUNK BUFFER
+# ─────────────────────────────────────────────
+class ChunkBuffer:
+    """
+    Byte-budgeted chunk store shared by all streams of this process.
+
+    Concurrent requests for the same key wait on ONE fetch task and get
+    the same bytes object back ("watch party" after a release). Every
+    acquire() must be paired with release(); entries still referenced by
+    a stream are skipped by eviction – dropping them would not free
+    memory anyway.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()    # key -> [data, refs]
+        self.inflight = {}              # key -> fetch task
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def acquire(self, key, fetch):
+        entry = self.entries.get(key)
+        if entry:
+            entry[1] += 1
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        task = self.inflight.get(key)
+        if task:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            # Own task: a viewer disconnecting must not cancel the others' fetch
+            task = asyncio.create_task(fetch())
+            self.inflight[key] = task
+            task.add_done_callback(lambda t: self._store(key, t))
+        data = await asyncio.shield(task)
+
+        entry = self.entries.get(key)
+        if entry:
+            entry[1] += 1
+        return data
+
+    def release(self, key):
+        entry = self.entries.get(key)
+        if entry and entry[1] > 0:
+            entry[1] -= 1
+            self._evict()
+
+    def _store(self, key, task):
+        self.inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        data = task.result()
+        if not data or len(data) > self.max_bytes:
+            return
+        self.entries[key] = [data, 0]
+        self.size += len(data)
+        self._evict()
+
+    def _evict(self):
+        if self.size <= self.max_bytes:
+            return
+        for key in [k for k, (_, refs) in self.entries.items() if not refs]:
+            data, _ = self.entries.pop(key)
+            self.size -= len(data)
+            if self.size <= self.max_bytes:
+                break
+
+    def stats(self):
+        return {
+            "chunks": len(self.entries),
+            "size": self.size,
+            "max_size": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "inflight": len(self.inflight)
+        }
@@ -0,0 +1,120 @@
+import os
+import mmap
+import logging
+from collections import OrderedDict
+import aiofiles
+import aiofiles.os
+
+logger = logging.getLogger(__name__)
+
+# ─────────────────────────────────────────────
+# 💽 DISK CHUNK CACHE (LRU, SIZE-CAPPED)
+# ─────────────────────────────────────────────
+class ChunkCache:
+    """
+    GetFile chunks on local disk, one file per (media_id, offset, chunk_size).
+
+    Writes go to a temp file + os.replace, so readers never see a partial
+    chunk. Hits are mmapped and returned as a memoryview – aiohttp writes
+    it to the socket without copying it into Python bytes first.
+    The LRU order lives in memory and is rebuilt from mtimes on start.
+    """
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()    # key -> size
+        self.writing = set()            # keys with a write in progress
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        if self.enabled:
+            self._load()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _file(self, key):
+        media_id, offset, chunk_size = key
+        return os.path.join(self.path, f"{media_id}_{offset}_{chunk_size}")
+
+    def _load(self):
+        os.makedirs(self.path, exist_ok=True)
+        found = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".tmp"):
+                os.remove(entry.path)   # Crash leftovers
+                continue
+            try:
+                key = tuple(int(x) for x in entry.name.split("_"))
+                stat = entry.stat()
+            except (ValueError, OSError):
+                continue
+            found.append((stat.st_mtime, key, stat.st_size))
+        for _, key, size in sorted(found):
+            self.entries[key] = size
+            self.size += size
+        logger.info(f"💽 Chunk cache: {len(self.entries)} chunks, {self.size / 1024 ** 2:.0f} MB")
+
+    def get(self, key):
+        """memoryview over the mmapped chunk, or None"""
+        if not self.enabled or key not in self.entries:
+            self.misses += 1
+            return None
+        try:
+            with open(self._file(key), "rb") as f:
+                # The mapping outlives the fd and is released with the view
+                view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except (OSError, ValueError):
+            self._forget(key)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return view
+
+    async def put(self, key, data):
+        if (not self.enabled or not data or len(data) > self.max_bytes
+                or key in self.entries or key in self.writing):
+            return
+        self.writing.add(key)
+        path = self._file(key)
+        tmp = f"{path}.tmp"
+        try:
+            async with aiofiles.open(tmp, "wb") as f:
+                await f.write(data)
+            await aiofiles.os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Chunk cache write failed: {e}")
+            try: await aiofiles.os.remove(tmp)
+            except OSError: pass
+            return
+        finally:
+            self.writing.discard(key)
+        self.entries[key] = len(data)
+        self.size += len(data)
+        await self._evict()
+
+    async def _evict(self):
+        while self.size > self.max_bytes and self.entries:
+            key = next(iter(self.entries))
+            self._forget(key)
+            try:
+                await aiofiles.os.remove(self._file(key))
+            except OSError:
+                pass
+
+    def _forget(self, key):
+        self.size -= self.entries.pop(key, 0)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "chunks": len(self.entries),
+            "size": self.size,
+            "max_size": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups * 100) if lookups else 0.0
+        }
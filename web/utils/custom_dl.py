@@ -1,11 +1,16 @@
 import math
+import asyncio
+from collections import deque
 from typing import Union
 from hydrogram.types import Message
+from info import STREAM_PREFETCH, STREAM_SESSIONS, STREAM_CACHE_SIZE, STREAM_CACHE_DIR, STREAM_BUFFER_SIZE
 from utils import temp
 from hydrogram import Client, utils, raw
 from hydrogram.session import Session, Auth
 from hydrogram.errors import AuthBytesInvalid
 from hydrogram.file_id import FileId, FileType, ThumbnailSource
+from web.utils.chunk_cache import ChunkCache
+from web.utils.chunk_buffer import ChunkBuffer
 
 
 async def chunk_size(length):
@@ -17,10 +22,22 @@ async def offset_fix(offset, chunksize):
     return offset
 
 
+# One lock per (client, session key) so concurrent streams don't open duplicates
+_session_locks = {}
+
+# 💽 Hot chunks on local disk (shared by every stream)
+chunk_cache = ChunkCache(STREAM_CACHE_DIR, STREAM_CACHE_SIZE * 1024 * 1024)
+_cache_writes = set()
+
+# 🧺 Chunks currently hot in RAM, one upstream fetch per key
+chunk_buffer = ChunkBuffer(STREAM_BUFFER_SIZE * 1024 * 1024)
+
+
 class TGCustomYield:
-    def __init__(self):
+    def __init__(self, worker: int = 0):
         """ A custom method to stream files from telegram. """
-        self.main_bot = temp.BOT
+        self.worker = worker
+        self.main_bot = temp.WORKERS.get(worker, temp.BOT)
 
     @staticmethod
     async def generate_file_properties(msg: Message):
@@ -28,48 +45,70 @@ class TGCustomYield:
         file_id_obj = FileId.decode(media.file_id)
         return file_id_obj
 
-    async def generate_media_session(self, client: Client, msg: Message):
+    async def generate_media_session(self, client: Client, msg: Message, index: int = 0):
+        """
+        Media session `index` of the file's DC. Session 0 lives under the
+        plain dc_id key (what hydrogram itself uses), extra pool members
+        under (dc_id, index); client.stop() closes all of them.
+        """
         data = await self.generate_file_properties(msg)
+        key = data.dc_id if index == 0 else (data.dc_id, index)
 
-        media_session = client.media_sessions.get(data.dc_id, None)
+        media_session = client.media_sessions.get(key, None)
+        if media_session is not None:
+            return media_session
 
-        if media_session is None:
-            if data.dc_id != await client.storage.dc_id():
-                media_session = Session(
-                    client, data.dc_id, await Auth(client, data.dc_id, await client.storage.test_mode()).create(),
-                    await client.storage.test_mode(), is_media=True
-                )
-                await media_session.start()
+        lock = _session_locks.setdefault((id(client), key), asyncio.Lock())
+        async with lock:
+            media_session = client.media_sessions.get(key, None)
+            if media_session is None:
+                media_session = await self.create_media_session(client, data.dc_id)
+                client.media_sessions[key] = media_session
 
-                for _ in range(3):
-                    exported_auth = await client.invoke(
-                        raw.functions.auth.ExportAuthorization(
-                            dc_id=data.dc_id
-                        )
+        return media_session
+
+    async def media_session_pool(self, client: Client, msg: Message):
+        """STREAM_SESSIONS sessions to the file's DC (created lazily, in parallel)"""
+        return await asyncio.gather(
+            *(self.generate_media_session(client, msg, i) for i in range(max(STREAM_SESSIONS, 1)))
+        )
+
+    @staticmethod
+    async def create_media_session(client: Client, dc_id: int):
+        if dc_id != await client.storage.dc_id():
+            media_session = Session(
+                client, dc_id, await Auth(client, dc_id, await client.storage.test_mode()).create(),
+                await client.storage.test_mode(), is_media=True
+            )
+            await media_session.start()
+
+            for _ in range(3):
+                exported_auth = await client.invoke(
+                    raw.functions.auth.ExportAuthorization(
+                        dc_id=dc_id
                     )
+                )
 
-                    try:
-                        await media_session.send(
-                            raw.functions.auth.ImportAuthorization(
-                                id=exported_auth.id,
-                                bytes=exported_auth.bytes
-                            )
+                try:
+                    await media_session.send(
+                        raw.functions.auth.ImportAuthorization(
+                            id=exported_auth.id,
+                            bytes=exported_auth.bytes
                         )
-                    except AuthBytesInvalid:
-                        continue
-                    else:
-                        break
+                    )
+                except AuthBytesInvalid:
+                    continue
                 else:
-                    await media_session.stop()
-                    raise AuthBytesInvalid
+                    break
             else:
-                media_session = Session(
-                    client, data.dc_id, await client.storage.auth_key(),
-                    await client.storage.test_mode(), is_media=True
-                )
-                await media_session.start()
-
-            client.media_sessions[data.dc_id] = media_session
+                await media_session.stop()
+                raise AuthBytesInvalid
+        else:
+            media_session = Session(
+                client, dc_id, await client.storage.auth_key(),
+                await client.storage.test_mode(), is_media=True
+            )
+            await media_session.start()
 
         return media_session
 
@@ -117,15 +156,9 @@ class TGCustomYield:
 
         return location
 
-    async def yield_file(self, media_msg: Message, offset: int, first_part_cut: int,
-                         last_part_cut: int, part_count: int, chunk_size: int):
-        client = self.main_bot
-        data = await self.generate_file_properties(media_msg)
-        media_session = await self.generate_media_session(client, media_msg)
-
-        current_part = 1
-        location = await self.get_location(data)
-
+    @staticmethod
+    async def get_chunk(media_session: Session, location, offset: int, chunk_size: int) -> bytes:
+        """One upload.GetFile round trip (b"" past the end of the file)"""
         r = await media_session.send(
             raw.functions.upload.GetFile(
                 location=location,
@@ -133,18 +166,80 @@ class TGCustomYield:
                 limit=chunk_size
             ),
         )
-
         if isinstance(r, raw.types.upload.File):
-            while current_part <= part_count:
-                chunk = r.bytes
+            return r.bytes
+        return b""
+
+    async def fetch_chunk(self, media_session: Session, location, key):
+        """
+        RAM buffer -> disk cache -> Telegram. Viewers asking for the same
+        chunk at once share one fetch; pair with chunk_buffer.release(key).
+        """
+        return await chunk_buffer.acquire(
+            key, lambda: self.load_chunk(media_session, location, key)
+        )
+
+    async def load_chunk(self, media_session: Session, location, key):
+        """Disk cache first, Telegram on a miss (the write doesn't hold up the stream)"""
+        media_id, offset, chunk_size = key
+        chunk = chunk_cache.get(key)
+        if chunk is not None:
+            return chunk
+        chunk = await self.get_chunk(media_session, location, offset, chunk_size)
+        if chunk and chunk_cache.enabled:
+            task = asyncio.create_task(chunk_cache.put(key, chunk))
+            _cache_writes.add(task)
+            task.add_done_callback(_cache_writes.discard)
+        return chunk
+
+    async def yield_file(self, media_msg: Message, offset: int, first_part_cut: int,
+                         last_part_cut: int, part_count: int, chunk_size: int):
+        """
+        Stream parts in order while up to STREAM_PREFETCH GetFile calls
+        are in flight, so the next chunks download while the client reads.
+        Multi-part ranges are split round-robin across the DC's session
+        pool (one session serialises its requests).
+        Pending requests are cancelled when the client disconnects.
+        """
+        client = self.main_bot
+        data = await self.generate_file_properties(media_msg)
+        if part_count > 1:
+            sessions = await self.media_session_pool(client, media_msg)
+        else:
+            sessions = [await self.generate_media_session(client, media_msg)]
+        location = await self.get_location(data)
+
+        window = max(STREAM_PREFETCH, len(sessions))
+        pending = deque()
+        next_part = 1
+
+        def fill_window():
+            nonlocal next_part
+            while next_part <= part_count and len(pending) < window:
+                key = (data.media_id, offset + (next_part - 1) * chunk_size, chunk_size)
+                media_session = sessions[(next_part - 1) % len(sessions)]
+                pending.append((key, asyncio.create_task(
+                    self.fetch_chunk(media_session, location, key)
+                )))
+                next_part += 1
+
+        held = None
+        try:
+            fill_window()
+            current_part = 1
+            while pending:
+                key, task = pending.popleft()
+                chunk = await task
+                held = key
                 if not chunk:
                     break
-                
+                fill_window()
+
                 # Logic Fix: Properly handling slice for Last Part
                 if part_count == 1:
                     yield chunk[first_part_cut:last_part_cut]
                     break
-                
+
                 if current_part == 1:
                     yield chunk[first_part_cut:]
                 elif current_part == part_count:
@@ -153,18 +248,18 @@ class TGCustomYield:
                 else:
                     yield chunk
 
-                # Prepare for next chunk
-                offset += chunk_size
+                chunk_buffer.release(held)
+                held = None
                 current_part += 1
-                
-                if current_part <= part_count:
-                    r = await media_session.send(
-                        raw.functions.upload.GetFile(
-                            location=location,
-                            offset=offset,
-                            limit=chunk_size
-                        ),
-                    )
+        finally:
+            # Client gone / stream done – drop the read-ahead
+            if held:
+                chunk_buffer.release(held)
+            for key, task in pending:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception() is None:
+                    chunk_buffer.release(key)
 
     async def download_as_bytesio(self, media_msg: Message):
         client = self.main_bot
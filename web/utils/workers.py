@@ -0,0 +1,62 @@
+import logging
+from hydrogram import Client
+from info import API_ID, API_HASH, WORKER_TOKENS
+from utils import temp
+
+logger = logging.getLogger(__name__)
+
+# ─────────────────────────────────────────────
+# 👷 STREAMING WORKER BOTS
+# ─────────────────────────────────────────────
+# Worker 0 is the main bot; WORKER_TOKENS adds more accounts, each with its
+# own MTProto connection, media sessions and FloodWait limits.
+# Every worker must be an admin of BIN_CHANNEL.
+async def start_workers(bot):
+    temp.WORKERS = {0: bot}
+    temp.WORK_LOADS = {0: 0}
+    for index, token in enumerate(WORKER_TOKENS, start=1):
+        worker = Client(
+            name=f"worker_{index}",
+            api_id=API_ID,
+            api_hash=API_HASH,
+            bot_token=token,
+            in_memory=True,
+            no_updates=True
+        )
+        try:
+            await worker.start()
+        except Exception as e:
+            logger.error(f"Worker {index} failed to start: {e}")
+            continue
+        temp.WORKERS[index] = worker
+        temp.WORK_LOADS[index] = 0
+    if len(temp.WORKERS) > 1:
+        logger.info(f"👷 {len(temp.WORKERS) - 1} streaming worker(s) started")
+
+
+async def stop_workers():
+    for index, worker in temp.WORKERS.items():
+        if index == 0:
+            continue
+        try:
+            await worker.stop()
+        except Exception:
+            pass
+
+
+def get_worker():
+    """Least-loaded connected worker -> (index, client)"""
+    alive = [i for i, w in temp.WORKERS.items() if w.is_connected] or [0]
+    index = min(alive, key=lambda i: temp.WORK_LOADS.get(i, 0))
+    return index, temp.WORKERS.get(index, temp.BOT)
+
+
+def workers_status():
+    return [
+        {
+            "id": index,
+            "connected": bool(worker.is_connected),
+            "load": temp.WORK_LOADS.get(index, 0)
+        }
+        for index, worker in temp.WORKERS.items()
+    ]